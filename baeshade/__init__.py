@@ -1,12 +1,22 @@
 from .baeshade import BaeColorMode
+from .baeshade import BaeBufferStorage, BaePresentMode
 from .baeshade import BaeSprite
+from .baeshade import BaeDisplayList, BaeDrawCmd
 from .baeshade import ColorPallette4bit, ColorPallette8bit, ColorPallette24bit,BaeFontStyle
 from .baeshade import BaeRenderingTask
+from .baeshade import BaeShaderUniforms
 from .baeshademath import BaeVec3d
 from .baeshademath import BaeVec2d
+from .baeshademath import BaeVec2Array, BaeVec3Array
 from .baeshademath import BaeBoundingBox2D
 from .baeshademath import BaeRay
 from .baeshademath import BaeMathUtil
 from .baeshadeutil import BaeshadeUtil
+from .baeshadeperf import BaePerfRecorder, BaePerfWindow
+from .baeshadesink import BaeFrameSink, BaeNullSink, BaeMemorySink, BaeFileSink
+from .baeshaderecord import BaeFrameRecorder, BaeFrameReplay, BaeRecordCompression
+from .baeshadeoutput import BaeOutputWriter
 from .baeshadeapp import BaeKeyboard
 from .baeshadeapp import BaeApp
+from .baeshadeapp import BaeFramePacer
+from .baeshadeapp import BaeQualityGovernor
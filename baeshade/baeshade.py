@@ -1,11 +1,20 @@
 import os
+import signal
 import datetime
+import struct
 import asyncio
+import threading
 import multiprocessing
-import queue
+from multiprocessing import shared_memory
 
 from .baeshademath import BaeVec3d,BaeVec2d,BaeMathUtil,BaeBoundingBox2D
 from .baeshadeutil import BaeshadeUtil
+from .baeshadeipc import BaeFrameRing, BaeFrameMailbox, BaeSharedDict, attachSharedMemory
+from .baeshaderaster import BaeRaster
+from .baeshadeperf import BaePerfRecorder
+from .baeshadesink import BaeFrameSink
+from .baeshaderecord import BaeFrameRecorder, BaeRecordCompression
+from .baeshadeoutput import BaeOutputWriter
 
 from typing import Optional, Callable
 from enum import Enum
@@ -13,6 +22,11 @@ from operator import itemgetter
 from itertools import groupby
 import time
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 BAECODEX = BaeshadeUtil.EncodeTable
 
 """
@@ -178,28 +192,127 @@ class BaeColorMode:
         """
         return '24-bit'
 
+class BaeBufferStorage:
+
+    @staticmethod
+    def PyList():
+        """
+        rows of BaeVec3d, default one, no extra dependency
+        """
+        return 'list'
+
+    @staticmethod
+    def UInt8():
+        """
+        contiguous H x W x 3 uint8 array, colors are quantified when written
+        require numpy
+        """
+        return 'uint8'
+
+    @staticmethod
+    def Float32():
+        """
+        contiguous H x W x 3 float32 array, keep colors unquantified until encoding
+        require numpy
+        """
+        return 'float32'
+
+class BaePresentMode:
+
+    @staticmethod
+    def Strict():
+        """
+        wait for the terminal, every frame is written
+        """
+        return 'strict'
+
+    @staticmethod
+    def Drop():
+        """
+        drop the new frame while the terminal is behind, default one
+        """
+        return 'drop'
+
+    @staticmethod
+    def Mailbox():
+        """
+        latest frame wins, a new frame replaces the one still waiting for the terminal
+        """
+        return 'mailbox'
+
+class BaeShaderUniforms:
+    """
+    per frame constants for a shader, captured once so every pixel sees the same values
+    also readable like the extra dict of a pixel shader: uniforms['time']
+    """
+    __slots__ = ['time', 'bw', 'bh', 'frame']
+
+    def __init__(self, bw:int, bh:int, frame:int = 0, t:Optional[float] = None):
+        """
+        bw, bh: buffer width and height
+        frame: frame counter of the pipeline
+        t: shader time, default time.time()
+        """
+        self.time = time.time() if t is None else t
+        self.bw = bw
+        self.bh = bh
+        self.frame = frame
+
+    def __getitem__(self, key:str):
+        return getattr(self, key)
+
+    def asDict(self)->dict:
+        return {'time':self.time,'bw':self.bw,'bh':self.bh,'frame':self.frame}
+
+def requireNumpy(feature:str):
+    if np is None:
+        raise ImportError(f'{feature} requires numpy, try: pip install numpy')
+
 class BaeBuffer:
     """
     virtual buffer for drawing
     """
     
-    def __init__(self,w:int,h:int,mode:BaeColorMode=BaeColorMode.Color8Bits,trimColor:BaeVec3d=BaeVec3d(0.0,0.0,0.0)):
+    def __init__(self,w:int,h:int,mode:BaeColorMode=BaeColorMode.Color8Bits,trimColor:BaeVec3d=BaeVec3d(0.0,0.0,0.0),
+                 storage:BaeBufferStorage=BaeBufferStorage.PyList, memory=None):
         """
         w:terminal canvas width
         h:terminal canvas height
+        storage: BaeBufferStorage, how pixels are kept in memory
+        memory: optional writable buffer the array storage lives in, e.g. shared memory
         """
         # row and colume in terminal
         self._termSize = BaeVec2d(w,BaeMathUtil.round(h/2))
         # virtual buffer size
         self._vSize = BaeVec2d(w,h)
         self._colormode = mode
-        self._virtualBuffer = [ [BaeVec3d() for x in range(w)] for y in range(h)]
+        self._storage = storage
+        match storage:
+            case BaeBufferStorage.UInt8:
+                requireNumpy('BaeBufferStorage.UInt8')
+                self._virtualBuffer = np.zeros((h,w,3), dtype=np.uint8) if memory is None else np.ndarray((h,w,3), dtype=np.uint8, buffer=memory)
+            case BaeBufferStorage.Float32:
+                requireNumpy('BaeBufferStorage.Float32')
+                self._virtualBuffer = np.zeros((h,w,3), dtype=np.float32) if memory is None else np.ndarray((h,w,3), dtype=np.float32, buffer=memory)
+            case _:
+                self._virtualBuffer = [ [BaeVec3d() for x in range(w)] for y in range(h)]
         self._cache = None
         self._cacheEx = None
+        # encoded bytes per physical row, rows written since last encode are re-encoded
+        self._rowCache = None
+        self._rowCacheBytes = None
+        self._writtenRows = set()
+        # color of the last clear, rows not in _touchedRows still hold only that color
+        self._clearColor = None
+        self._clearRowBytes = None
+        self._touchedRows = set()
         self._bDirt = False
         self._dirtRows = None
         self._effectiveRows = None
         self._invalidColor = trimColor
+        self._coordGrid = None
+        # (spans, mask) of pixels differ from trim color, rebuilt after writes
+        self._opaque = None
 
     def getVirtualBuffer(self):
         return self._virtualBuffer
@@ -208,13 +321,92 @@ class BaeBuffer:
     def virtualBuffer(self):
         return self._virtualBuffer
     
+    @property
+    def storage(self):
+        return self._storage
+
+    @property
+    def isArray(self) -> bool:
+        """
+        true if pixels are kept in a numpy array
+        """
+        return self._storage != BaeBufferStorage.PyList
+
     def getPixel(self,x:int,y:int):
+        if self.isArray:
+            r,g,b = self._virtualBuffer[y,x].tolist()
+            return BaeVec3d(r,g,b)
         return self._virtualBuffer[y][x]
 
     def getEffectPixel(self,x:int,y:int):
-        test_color = self._virtualBuffer[y][x]
+        test_color = self.getPixel(x,y)
         return test_color if test_color != self._invalidColor else None
 
+    def getRegion(self,x:int,y:int,w:int,h:int):
+        """
+        read a w x h block of pixels start at (x,y), clipped by buffer size
+        array storage returns a read-only view, otherwise rows of BaeVec3d
+        """
+        x0, y0 = max(0,x), max(0,y)
+        x1, y1 = min(self.virtualSize.X, x + w), min(self.virtualSize.Y, y + h)
+        if self.isArray:
+            region = self._virtualBuffer[y0:y1, x0:x1]
+            region.flags.writeable = False
+            return region
+        return [row[x0:x1] for row in self._virtualBuffer[y0:y1]]
+
+    def fillRegion(self,x:int,y:int,pixels)->None:
+        """
+        write a block of pixels start at (x,y), clipped by buffer size
+        pixels: H x W x 3 array, or rows of BaeVec3d
+        """
+        if np is not None and isinstance(pixels, np.ndarray):
+            h, w = pixels.shape[0], pixels.shape[1]
+        else:
+            h = len(pixels)
+            w = len(pixels[0]) if h > 0 else 0
+
+        x0, y0 = max(0,x), max(0,y)
+        x1, y1 = min(self.virtualSize.X, x + w), min(self.virtualSize.Y, y + h)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        src = pixels[y0-y:y1-y]
+        if self.isArray:
+            if not isinstance(src, np.ndarray):
+                src = np.array([[(c.X,c.Y,c.Z) for c in row[x0-x:x1-x]] for row in src], dtype=np.float64)
+            else:
+                src = src[:, x0-x:x1-x]
+            self._virtualBuffer[y0:y1, x0:x1] = BaeTermDraw.quantifyArray(src) if self._storage == BaeBufferStorage.UInt8 else src
+        else:
+            if np is not None and isinstance(src, np.ndarray):
+                src = [[BaeVec3d(r,g,b) for r,g,b in row] for row in src[:, x0-x:x1-x].tolist()]
+            else:
+                src = [row[x0-x:x1-x] for row in src]
+            for idx, row in enumerate(src):
+                self._virtualBuffer[y0+idx][x0:x1] = row
+
+        self.__markWritten(y0, y1)
+
+    def __markWritten(self, y0:int, y1:int):
+        """
+        bulk writes touched virtual rows [y0, y1)
+        """
+        self._bDirt = True
+        self._opaque = None
+        rows = range(y0 >> 1, ((y1 - 1) >> 1) + 1)
+        self._writtenRows.update(rows)
+        self._touchedRows.update(rows)
+
+    def asArray(self):
+        """
+        whole buffer as a H x W x 3 array, array storage returns the buffer itself
+        """
+        if self.isArray:
+            return self._virtualBuffer
+        requireNumpy('BaeBuffer.asArray')
+        return np.array([[(c.X,c.Y,c.Z) for c in row] for row in self._virtualBuffer], dtype=np.float64)
+
     @property
     def colorMode(self):
         return self._colormode
@@ -241,16 +433,114 @@ class BaeBuffer:
         """
         set RGB color to specified position
         """
-        self._virtualBuffer[y][x] = color
+        match self._storage:
+            case BaeBufferStorage.UInt8:
+                self._virtualBuffer[y,x] = (max(0, min(255,int(color.X))), max(0, min(255,int(color.Y))), max(0, min(255,int(color.Z))))
+            case BaeBufferStorage.Float32:
+                self._virtualBuffer[y,x] = (color.X, color.Y, color.Z)
+            case _:
+                self._virtualBuffer[y][x] = color
+        self._bDirt = True
+        self._opaque = None
+        self._writtenRows.add(y >> 1)
+        self._touchedRows.add(y >> 1)
+
+    def __storedColor(self, color:BaeVec3d):
+        match self._storage:
+            case BaeBufferStorage.UInt8:
+                return (max(0, min(255,int(color.X))), max(0, min(255,int(color.Y))), max(0, min(255,int(color.Z))))
+            case BaeBufferStorage.Float32:
+                return (color.X, color.Y, color.Z)
+            case _:
+                return color
+
+    def fillSpan(self, y:int, x0:int, x1:int, color:BaeVec3d)->None:
+        """
+        set pixels [x0, x1) of row y to color, clipped to the buffer
+        """
+        if y < 0 or y >= self.virtualSize.Y:
+            return
+        x0, x1 = max(0, x0), min(self.virtualSize.X, x1)
+        if x0 >= x1:
+            return
+        if self.isArray:
+            self._virtualBuffer[y, x0:x1] = self.__storedColor(color)
+        else:
+            self._virtualBuffer[y][x0:x1] = [color] * (x1 - x0)
+        self._bDirt = True
+        self._opaque = None
+        self._writtenRows.add(y >> 1)
+        self._touchedRows.add(y >> 1)
+
+    def fillPoints(self, xs:list, ys:list, color:BaeVec3d)->None:
+        """
+        set pixels (xs[i], ys[i]) to color in one go, they must be inside the buffer
+        """
+        if len(xs) == 0:
+            return
+        if self.isArray:
+            self._virtualBuffer[ys, xs] = self.__storedColor(color)
+        else:
+            for x, y in zip(xs, ys):
+                self._virtualBuffer[y][x] = color
         self._bDirt = True
+        self._opaque = None
+        rows = {y >> 1 for y in ys}
+        self._writtenRows.update(rows)
+        self._touchedRows.update(rows)
+
+    def fillRect(self, x:int, y:int, w:int, h:int, color:BaeVec3d)->None:
+        """
+        set a w x h block at (x, y) to color, clipped to the buffer
+        """
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(self.virtualSize.X, x + w), min(self.virtualSize.Y, y + h)
+        if x0 >= x1 or y0 >= y1:
+            return
+        if self.isArray:
+            self._virtualBuffer[y0:y1, x0:x1] = self.__storedColor(color)
+        else:
+            span = [color] * (x1 - x0)
+            for row in self._virtualBuffer[y0:y1]:
+                row[x0:x1] = span
+        self.__markWritten(y0, y1)
 
     def __genEncode(self):
         """
-        Encode colors to ANSI strings
+        Encode colors to ANSI strings, reuse rows not written since last time
         """
-        self._cache = BaeTermDraw.encodeBuffer(self)
+        if self._rowCache is None:
+            self._rowCache = [b''] * self.pyhicalSize.Y
+            rows = list(range(self.pyhicalSize.Y))
+        else:
+            rows = sorted(r for r in self._writtenRows if r < self.pyhicalSize.Y)
+
+        if self._clearColor is not None:
+            # rows untouched since clear share one encoding
+            blank = [r for r in rows if r not in self._touchedRows]
+            if len(blank) > 0:
+                if self._clearRowBytes is None:
+                    self._clearRowBytes = BaeTermDraw.encodeRows(self, blank[:1])[0]
+                for row in blank:
+                    self._rowCache[row] = self._clearRowBytes
+                rows = [r for r in rows if r in self._touchedRows]
+
+        for row, encode in zip(rows, BaeTermDraw.encodeRows(self, rows)):
+            self._rowCache[row] = encode
+        self._writtenRows.clear()
+
+        self._rowCacheBytes = b''.join(self._rowCache)
+        self._cache = None
         self._bDirt = False
-        return self._cache
+        return self._rowCacheBytes
+
+    def invalidateEncode(self):
+        """
+        drop encoded rows, e.g. after writing virtualBuffer directly
+        """
+        self._rowCache = None
+        self._clearColor = None
+        self._bDirt = True
     
     def getDirtRow(self):
         if self._dirtRows is not None:
@@ -260,6 +550,13 @@ class BaeBuffer:
             return self._dirtRows
     
     def __genDirtRow(self, ignoreColor:BaeVec3d):
+        if self.isArray:
+            ignore = np.array((ignoreColor.X,ignoreColor.Y,ignoreColor.Z), dtype=np.float64)
+            mask = np.any(np.abs(self._virtualBuffer - ignore) >= ignoreColor._eps, axis=2)
+            #dirt rt, must update 2 vertical subpixel once
+            self._dirtRows = [np.flatnonzero(mask[y*2:y*2+2].any(axis=0)).tolist() for y in range(self.pyhicalSize.Y)]
+            return
+
         self._dirtRows = [set() for _ in range(self.pyhicalSize.Y)]
         for y in range(self.virtualSize.Y):
             for x in range(self.virtualSize.X):
@@ -268,11 +565,20 @@ class BaeBuffer:
                     #dirt rt, must update 2 vertical subpixel once
                     self._dirtRows[y//2].add(x)
         #sort set
-        self._dirtRows = map(sorted, self._dirtRows)
+        self._dirtRows = list(map(sorted, self._dirtRows))
 
-    def getEncodeBuffer(self)->str:
-        if self.isValid is False:
+    def getEncodeBytes(self)->bytes:
+        """
+        encoded buffer as UTF-8 bytes
+        """
+        if self.isValid is False or self._rowCacheBytes is None:
             self.__genEncode()
+
+        return self._rowCacheBytes
+
+    def getEncodeBuffer(self)->str:
+        if self.isValid is False or self._cache is None:
+            self._cache = self.getEncodeBytes().decode()
         
         return self.cache
     
@@ -314,6 +620,132 @@ class BaeBuffer:
 
         return self._effectiveRows
 
+    def clear(self, color:BaeVec3d)->None:
+        """
+        set every pixel to color in bulk and remember it as the clear color
+        clearing again with the same color only refills rows written since
+        """
+        w = self.virtualSize.X
+        h = self.virtualSize.Y
+        if self._clearColor is not None and self._clearColor == color:
+            rows = sorted(self._touchedRows)
+        else:
+            rows = None
+            # one private copy shared by every cell, cells are never modified in place
+            self._clearColor = BaeVec3d(color.X, color.Y, color.Z)
+            self._clearRowBytes = None
+        color = self._clearColor
+
+        if rows is None:
+            if self.isArray:
+                self._virtualBuffer[:] = BaeTermDraw.quantifyArray(np.array((color.X,color.Y,color.Z))) if self._storage == BaeBufferStorage.UInt8 else (color.X,color.Y,color.Z)
+            else:
+                for row in self._virtualBuffer:
+                    row[:] = [color] * w
+            self.__markWritten(0, h)
+        elif len(rows) > 0:
+            for row in rows:
+                self.fillRect(0, row * 2, w, 2, color)
+            self._writtenRows.update(rows)
+        self._touchedRows = set()
+
+    @property
+    def clearColor(self)->Optional[BaeVec3d]:
+        """
+        color of the last clear, None when unknown
+        """
+        return self._clearColor
+
+    @property
+    def touchedRows(self)->set:
+        """
+        physical rows written since the last clear, the others only hold clearColor
+        """
+        return self._touchedRows
+
+    def getOpaqueSpans(self):
+        """
+        list of tuple(start,length) per virtual row, pixels not equal to trim color
+        cached until the buffer is written again
+        """
+        return self.__genOpaque()[0]
+
+    def getOpaqueMask(self):
+        """
+        H x W bool array of pixels not equal to trim color, require numpy
+        """
+        requireNumpy('getOpaqueMask')
+        return self.__genOpaque()[1]
+
+    def __genOpaque(self):
+        if self._opaque is not None:
+            return self._opaque
+
+        trim = self._invalidColor
+        mask = None
+        if self.isArray:
+            ignore = np.array((trim.X,trim.Y,trim.Z), dtype=np.float64)
+            mask = np.any(np.abs(self._virtualBuffer - ignore) >= trim._eps, axis=2)
+            # +1 where a run starts, -1 where it ends
+            edges = np.diff(np.pad(mask, ((0,0),(1,1))).astype(np.int8), axis=1)
+            spans = []
+            for row in edges:
+                starts = np.flatnonzero(row == 1)
+                ends = np.flatnonzero(row == -1)
+                spans.append(list(zip(starts.tolist(), (ends - starts).tolist())))
+        else:
+            spans = []
+            for row in self._virtualBuffer:
+                rowSpans = []
+                x = 0
+                for bOpaque, grp in groupby(row, lambda c : c != trim):
+                    length = sum(1 for _ in grp)
+                    if bOpaque:
+                        rowSpans.append((x, length))
+                    x += length
+                spans.append(rowSpans)
+            if np is not None:
+                mask = np.zeros((self.virtualSize.Y, self.virtualSize.X), dtype=bool)
+                for y, rowSpans in enumerate(spans):
+                    for start, length in rowSpans:
+                        mask[y, start:start+length] = True
+
+        self._opaque = (spans, mask)
+        return self._opaque
+
+    def blit(self, src:'BaeBuffer', x:int, y:int)->None:
+        """
+        copy opaque pixels of src to (x,y), clipped by buffer size
+        """
+        dw, dh = self.virtualSize.X, self.virtualSize.Y
+        sw, sh = src.virtualSize.X, src.virtualSize.Y
+        sx0, sy0 = max(0, -x), max(0, -y)
+        sx1, sy1 = min(sw, dw - x), min(sh, dh - y)
+        if sx0 >= sx1 or sy0 >= sy1:
+            return
+
+        if self.isArray and src.isArray:
+            # one masked copy over the clipped area
+            pixels = src.virtualBuffer[sy0:sy1, sx0:sx1]
+            if self._storage == BaeBufferStorage.UInt8:
+                pixels = BaeTermDraw.quantifyArray(pixels)
+            np.copyto(self._virtualBuffer[sy0+y:sy1+y, sx0+x:sx1+x], pixels,
+                      where=src.getOpaqueMask()[sy0:sy1, sx0:sx1, np.newaxis], casting='unsafe')
+        else:
+            spans = src.getOpaqueSpans()
+            for sy in range(sy0, sy1):
+                for start, length in spans[sy]:
+                    x0 = max(start, sx0)
+                    x1 = min(start + length, sx1)
+                    if x0 >= x1:
+                        continue
+                    if not self.isArray and not src.isArray:
+                        self._virtualBuffer[sy + y][x0 + x:x1 + x] = src.virtualBuffer[sy][x0:x1]
+                    else:
+                        self.fillRegion(x0 + x, sy + y, src.getRegion(x0, sy, x1 - x0, 1))
+
+        self.__markWritten(sy0 + y, sy1 + y)
+
     def compute(self,kernel:Optional[Callable[[int,int, dict],BaeVec3d]]):
         """
         Run per pixel
@@ -330,20 +762,72 @@ class BaeBuffer:
 
                 self.fillAt(col,row, kernel(col,row, extra))
 
+    def computeVectorized(self, kernel:Optional[Callable], uniforms:Optional[BaeShaderUniforms] = None):
+        """
+        Run once for the whole buffer
+        kernel(x, y, uniforms): x, y are H x W float arrays of pixel coordinates
+        return a H x W x 3 array (or anything broadcast to it), written in one step
+        """
+        if kernel == None:
+            return
+        requireNumpy('computeVectorized')
+
+        bw = self.virtualSize.X
+        bh = self.virtualSize.Y
+        if uniforms is None:
+            uniforms = BaeShaderUniforms(bw, bh)
+
+        if self._coordGrid is None:
+            y, x = np.mgrid[0:bh, 0:bw].astype(np.float64)
+            x.flags.writeable = False
+            y.flags.writeable = False
+            self._coordGrid = (x, y)
+
+        x, y = self._coordGrid
+        color = np.broadcast_to(np.asarray(kernel(x, y, uniforms)), (bh, bw, 3))
+        self.fillRegion(0, 0, color)
+
+    def setColorMode(self, mode:BaeColorMode)->None:
+        """
+        encode with another color mode from now on, pixels are kept
+        """
+        if mode != self._colormode:
+            self._colormode = mode
+            self.invalidateEncode()
+
+    def upscale(self, src:'BaeBuffer', factor:int)->None:
+        """
+        fill the whole buffer with src scaled up by factor, nearest pixel
+        src should cover at least ceil(size / factor) pixels
+        """
+        w, h = self.virtualSize.X, self.virtualSize.Y
+        if self.isArray or src.isArray:
+            pixels = src.asArray()[:(h + factor - 1) // factor, :(w + factor - 1) // factor]
+            self.fillRegion(0, 0, pixels.repeat(factor, axis=0).repeat(factor, axis=1)[:h, :w])
+            return
+
+        for sy, srcRow in enumerate(src.virtualBuffer[:(h + factor - 1) // factor]):
+            row = [c for c in srcRow for _ in range(factor)][:w]
+            for y in range(sy * factor, min(h, (sy + 1) * factor)):
+                self._virtualBuffer[y][:] = row
+        self.__markWritten(0, h)
+
 class BaeSprite():
     def __init__(self,w:int,h:int,
                  cnt:int = 1,
                  fps:int=10,
                  mode:BaeColorMode=BaeColorMode.Color8Bits,
-                 bgColr:BaeVec3d = BaeVec3d(0.0,0.0,0.0)):
+                 bgColr:BaeVec3d = BaeVec3d(0.0,0.0,0.0),
+                 storage:BaeBufferStorage=BaeBufferStorage.PyList):
         """
         w: width of sprite
         h: height of sprite
         cnt: sequence of the sprite
         fps: sprite playing speed
         mode: BaeColorMode
+        storage: BaeBufferStorage for every frame
         """
-        self._buff = [BaeBuffer(w,h,mode,bgColr) for i in range(cnt)]
+        self._buff = [BaeBuffer(w,h,mode,bgColr,storage) for i in range(cnt)]
         self._seqLen = cnt
         self._bgColor = bgColr
         self._playIndex = 0
@@ -368,6 +852,20 @@ class BaeSprite():
         if color != self.bgColor:
             self._bb.addPoint(x,y)
 
+    def rawFillFrame(self,pixels,seq:int=0)->None:
+        """
+        fill a whole frame at once, pixels: H x W x 3 array or rows of BaeVec3d
+        """
+        self._buff[seq].fillRegion(0, 0, pixels)
+
+    def bake(self)->None:
+        """
+        precompute opaque spans of every frame, call it once all pixels are filled
+        otherwise they are built on first draw
+        """
+        for buff in self._buff:
+            buff.getOpaqueSpans()
+
     def seq(self,idx:int)->BaeBuffer:
         i = BaeMathUtil.clamp(idx, 0, self.seqNum - 1)
         return self._buff[i]
@@ -393,20 +891,371 @@ class BaeSprite():
     def seqNum(self):
         return self._seqLen
 
+class BaeDrawCmd:
+    """
+    kinds of commands recorded in a BaeDisplayList
+    """
+
+    @staticmethod
+    def Shader():
+        return 'shader'
+
+    @staticmethod
+    def Rect():
+        return 'rect'
+
+    @staticmethod
+    def Sprite():
+        return 'sprite'
+
+    @staticmethod
+    def Polygon():
+        return 'polygon'
+
+    @staticmethod
+    def Circle():
+        return 'circle'
+
+    @staticmethod
+    def Line():
+        return 'line'
+
+    @staticmethod
+    def ThickLine():
+        return 'thickline'
+
+    @staticmethod
+    def Text():
+        return 'text'
+
+class BaeDisplayList:
+    """
+    record draw commands with a z order, execute them later in one pass:
+    sorted by z, culled when off screen or fully covered by an opaque command above,
+    then run in batches of the same kind
+    within the same z commands are grouped by kind, use different z to force an order
+    text is not rasterized, it is written over the frame after the pixels
+    """
+
+    # batch order inside one z, opaque fills first
+    _KindRank = {
+        BaeDrawCmd.Shader: 0,
+        BaeDrawCmd.Rect: 1,
+        BaeDrawCmd.Sprite: 2,
+        BaeDrawCmd.Polygon: 3,
+        BaeDrawCmd.Circle: 4,
+        BaeDrawCmd.Line: 5,
+        BaeDrawCmd.ThickLine: 6,
+        BaeDrawCmd.Text: 7,
+    }
+
+    def __init__(self):
+        # (z, rank, order, kind, bounds x0 y0 x1 y1, bOpaque, args)
+        self._cmds = []
+        self._stats = {'recorded': 0, 'culled': 0, 'hidden': 0, 'batches': 0}
+
+    def __len__(self):
+        return len(self._cmds)
+
+    @property
+    def stats(self)->dict:
+        """
+        counters of last execute: recorded, culled (off screen), hidden (covered), batches
+        """
+        return self._stats
+
+    def clear(self)->None:
+        self._cmds = []
+
+    def __record(self, kind, z:int, bounds, bOpaque:bool, args):
+        self._cmds.append((z, BaeDisplayList._KindRank[kind], len(self._cmds), kind, bounds, bOpaque, args))
+
+    def sprite(self, sprite:BaeSprite, z:int = 0)->None:
+        """
+        sprite at its current position, the frame advances when executed
+        """
+        x, y = round(sprite.Pos.X), round(sprite.Pos.Y)
+        size = sprite.seq(0).virtualSize
+        self.__record(BaeDrawCmd.Sprite, z, (x, y, x + size.X, y + size.Y), False, (sprite, x, y))
+
+    def rect(self, pos:BaeVec2d, size:BaeVec2d, color:BaeVec3d, z:int = 0, bFill:bool = True)->None:
+        x, y, w, h = int(pos.X), int(pos.Y), int(size.X), int(size.Y)
+        self.__record(BaeDrawCmd.Rect, z, (x, y, x + w, y + h), bFill, (x, y, w, h, color, bFill))
+
+    def circle(self, center:BaeVec2d, r:float, color:BaeVec3d, z:int = 0)->None:
+        """
+        solid circle, unlike drawSolidCircle2D the center is not clamped into the buffer
+        """
+        cx, cy, reach = int(center.X), int(center.Y), int(r)
+        self.__record(BaeDrawCmd.Circle, z, (cx - reach, cy - reach, cx + reach + 1, cy + reach + 1), False, (cx, cy, r, color))
+
+    def line(self, start:BaeVec2d, end:BaeVec2d, color:BaeVec3d, z:int = 0)->None:
+        """
+        Bresenham line with both ends
+        """
+        x0, y0, x1, y1 = int(start.X), int(start.Y), int(end.X), int(end.Y)
+        self.__record(BaeDrawCmd.Line, z, (min(x0, x1), min(y0, y1), max(x0, x1) + 1, max(y0, y1) + 1), False, (x0, y0, x1, y1, color))
+
+    def thickLine(self, start:BaeVec2d, end:BaeVec2d, thickness:float, color:BaeVec3d, z:int = 0)->None:
+        pad = int(thickness * 0.5) + 1
+        bounds = (int(min(start.X, end.X)) - pad, int(min(start.Y, end.Y)) - pad,
+                  int(max(start.X, end.X)) + pad + 1, int(max(start.Y, end.Y)) + pad + 1)
+        self.__record(BaeDrawCmd.ThickLine, z, bounds, False, (start.X, start.Y, end.X, end.Y, thickness, color))
+
+    def triangle(self, a:BaeVec2d, b:BaeVec2d, c:BaeVec2d, color:BaeVec3d, z:int = 0)->None:
+        self.polygon([a, b, c], color, z)
+
+    def polygon(self, points:list[BaeVec2d], color:BaeVec3d, z:int = 0)->None:
+        pts = [(p.X, p.Y) for p in points]
+        xs = [p[0] for p in pts]
+        ys = [p[1] for p in pts]
+        bounds = (int(min(xs)) - 1, int(min(ys)) - 1, int(max(xs)) + 1, int(max(ys)) + 1)
+        self.__record(BaeDrawCmd.Polygon, z, bounds, False, (pts, color))
+
+    def shader(self, pos:BaeVec2d, size:BaeVec2d, kernel:Callable[[object,object,BaeShaderUniforms],object], z:int = 0)->None:
+        """
+        run a vectorized kernel over a region, like runShaderVectorized with absolute coordinates
+        require numpy
+        """
+        requireNumpy('BaeDisplayList.shader')
+        x, y, w, h = int(pos.X), int(pos.Y), int(size.X), int(size.Y)
+        self.__record(BaeDrawCmd.Shader, z, (x, y, x + w, y + h), True, (x, y, w, h, kernel))
+
+    def text(self, x:int, y:int, txt:str, fontColor=None, bgColor=None, style:BaeFontStyle = 0, z:int = 0)->None:
+        """
+        text at terminal column x, row y (1-based) over the frame, same as drawStyleText
+        """
+        fontColor = ColorPallette4bit.white if fontColor is None else fontColor
+        bgColor = ColorPallette4bit.black_bg if bgColor is None else bgColor
+        self.__record(BaeDrawCmd.Text, z, None, False, (x, y, txt, fontColor, bgColor, style))
+
+    def execute(self, buff:BaeBuffer, delta:float = 0.0, uniforms:Optional[BaeShaderUniforms] = None)->list:
+        """
+        draw recorded commands to buff
+        return text commands as (x, y, txt, fontColor, bgColor, style), in z order
+        """
+        bw, bh = buff.virtualSize.X, buff.virtualSize.Y
+        stats = {'recorded': len(self._cmds), 'culled': 0, 'hidden': 0, 'batches': 0}
+        self._stats = stats
+
+        visible = []
+        occluders = []
+        # walk from top to bottom, an opaque command hides everything below it inside its rect
+        for cmd in sorted(self._cmds, reverse=True):
+            kind, bounds, bOpaque = cmd[3], cmd[4], cmd[5]
+            if bounds is not None:
+                x0, y0 = max(0, bounds[0]), max(0, bounds[1])
+                x1, y1 = min(bw, bounds[2]), min(bh, bounds[3])
+                if x0 >= x1 or y0 >= y1:
+                    stats['culled'] += 1
+                    continue
+                if any(ox0 <= x0 and oy0 <= y0 and x1 <= ox1 and y1 <= oy1 for ox0, oy0, ox1, oy1 in occluders):
+                    stats['hidden'] += 1
+                    continue
+                if bOpaque:
+                    occluders.append((x0, y0, x1, y1))
+            visible.append(cmd)
+        visible.reverse()
+
+        texts = []
+        for kind, grp in groupby(visible, lambda cmd : cmd[3]):
+            stats['batches'] += 1
+            batch = [cmd[6] for cmd in grp]
+            match kind:
+                case BaeDrawCmd.Text:
+                    texts.extend(batch)
+                case _:
+                    BaeDisplayList.__runBatch(buff, kind, batch, delta, uniforms)
+        return texts
+
+    @staticmethod
+    def __runBatch(buff:BaeBuffer, kind, batch:list, delta:float, uniforms:Optional[BaeShaderUniforms]):
+        bw, bh = buff.virtualSize.X, buff.virtualSize.Y
+        match kind:
+            case BaeDrawCmd.Sprite:
+                for sprite, x, y in batch:
+                    buff.blit(sprite.playAtRate(delta), x, y)
+            case BaeDrawCmd.Rect:
+                rect = BaeRaster.rect
+                for x, y, w, h, color, bFill in batch:
+                    rect(buff, x, y, w, h, color, bFill)
+            case BaeDrawCmd.Circle:
+                circle = BaeRaster.circle
+                for args in batch:
+                    circle(buff, *args)
+            case BaeDrawCmd.Line:
+                line = BaeRaster.line
+                for args in batch:
+                    line(buff, *args)
+            case BaeDrawCmd.ThickLine:
+                thickLine = BaeRaster.thickLine
+                for args in batch:
+                    thickLine(buff, *args)
+            case BaeDrawCmd.Polygon:
+                polygon = BaeRaster.polygon
+                for pts, color in batch:
+                    polygon(buff, pts, color)
+            case BaeDrawCmd.Shader:
+                if uniforms is None:
+                    uniforms = BaeShaderUniforms(bw, bh)
+                for x, y, w, h, kernel in batch:
+                    x0, y0 = max(0, x), max(0, y)
+                    x1, y1 = min(bw, x + w), min(bh, y + h)
+                    ys, xs = np.mgrid[y0:y1, x0:x1].astype(np.float64)
+                    color = np.broadcast_to(kernel(xs, ys, uniforms), (y1 - y0, x1 - x0, 3))
+                    buff.fillRegion(x0, y0, color)
+
+class BaeSwapChain:
+    """
+    N independent backbuffers, each one cycles free -> acquired -> presented -> free
+    a presented buffer with a fence stays in use until the consumer has passed the fence
+    """
+
+    Free = 0
+    Acquired = 1
+    Presented = 2
+
+    def __init__(self, count:int, w:int, h:int, mode:BaeColorMode, storage:BaeBufferStorage = BaeBufferStorage.PyList,
+                 bShared:bool = False):
+        """
+        count: number of buffers
+        bShared: keep the pixels in one shared memory block so other processes can read them, require array storage
+        """
+        self._shm = None
+        if bShared:
+            assert storage == BaeBufferStorage.UInt8, "shared swap chain need BaeBufferStorage.UInt8"
+            size = w * h * 3
+            self._shm = shared_memory.SharedMemory(create=True, size=size * count)
+            self._buffers = [BaeBuffer(w,h,mode,storage=storage,memory=self._shm.buf[i*size:(i+1)*size]) for i in range(count)]
+        else:
+            self._buffers = [BaeBuffer(w,h,mode,storage=storage) for i in range(count)]
+        self._states = [BaeSwapChain.Free] * count
+        self._fences = [None] * count
+        self._next = 0
+
+    @property
+    def count(self)->int:
+        return len(self._buffers)
+
+    @property
+    def sharedName(self)->Optional[str]:
+        """
+        name of the shared memory block holding all buffers, in index order
+        """
+        return self._shm.name if self._shm is not None else None
+
+    def buffer(self, idx:int)->BaeBuffer:
+        return self._buffers[idx]
+
+    def state(self, idx:int)->int:
+        return self._states[idx]
+
+    def acquire(self, consumed:Callable[[],int] = None, clearColor:Optional[BaeVec3d] = None):
+        """
+        take the next free buffer in round robin order, return (index, buffer)
+        consumed: progress of the consumer, used to retire presented buffers, wait until one is free
+        clearColor: clear the buffer before drawing
+        """
+        while True:
+            if consumed is not None:
+                self.retire(consumed())
+            for step in range(self.count):
+                idx = (self._next + step) % self.count
+                if self._states[idx] == BaeSwapChain.Free:
+                    self._next = (idx + 1) % self.count
+                    self._states[idx] = BaeSwapChain.Acquired
+                    if clearColor is not None:
+                        self._buffers[idx].clear(clearColor)
+                    return idx, self._buffers[idx]
+            assert consumed is not None, "no free buffer in swap chain"
+            time.sleep(0.0005)
+
+    def present(self, idx:int, fence:Optional[int] = None)->None:
+        """
+        hand buffer idx to the consumer
+        fence: sequence number the consumer must pass before the buffer is reused, None release at once
+        """
+        assert self._states[idx] == BaeSwapChain.Acquired, "present a buffer not acquired"
+        if fence is None:
+            self.release(idx)
+        else:
+            self._states[idx] = BaeSwapChain.Presented
+            self._fences[idx] = fence
+
+    def release(self, idx:int)->None:
+        self._states[idx] = BaeSwapChain.Free
+        self._fences[idx] = None
+
+    def retireFence(self, fence:int)->None:
+        """
+        release the presented buffer waiting on fence, the consumer dropped that frame without reading it
+        """
+        for idx, bufferFence in enumerate(self._fences):
+            if self._states[idx] == BaeSwapChain.Presented and bufferFence == fence:
+                self.release(idx)
+
+    def retire(self, consumed:int)->None:
+        """
+        release presented buffers whose fence is passed
+        """
+        for idx, fence in enumerate(self._fences):
+            if self._states[idx] == BaeSwapChain.Presented and consumed > fence:
+                self.release(idx)
+
+    def close(self):
+        if self._shm is None:
+            return
+        self._buffers = []
+        try:
+            self._shm.close()
+        except BufferError:
+            # someone still holds pixels of a buffer, leave the mapping to the process exit
+            pass
+        self._shm.unlink()
+        self._shm = None
+
 class BaeEncodeWorker():
-    def __init__(self, func=None, args=()):
-        self._worker = multiprocessing.Process(target=func, args=args)
+    def __init__(self, func=None, args=(), bThread:bool = False):
+        """
+        bThread: run func on a thread of this process, it leaves once payload['bQuit'] is set
+        """
+        self._bThread = bThread
+        if bThread:
+            self._worker = threading.Thread(target=func, args=args, daemon=True)
+        else:
+            self._worker = multiprocessing.Process(target=func, args=args)
+        self._payload = args[0]
+        self._bStarted = False
+
+    @property
+    def isStarted(self)->bool:
+        return self._bStarted
+
     def run(self):
-        self._worker.start()
+        if not self._bStarted:
+            self._bStarted = True
+            self._worker.start()
 
     def stop(self):
-        self._worker.terminate()
+        if not self._bStarted:
+            return
+        if self._bThread:
+            self._payload['bQuit'] = True
+        else:
+            self._worker.terminate()
         self._worker.join()
-    
+
 class BaeWorkerPayload():
-    def __init__(self, payload):
-        self._payload = multiprocessing.Manager().dict()
-        self._payload.update(payload)
+    """
+    settings the worker reads while running, the last value wins
+    kept apart from the frame rings: a frame can be dropped or superseded, a setting must not,
+    and each ring has one writer, frames go to the worker and stats come back
+    """
+    def __init__(self, payload, bShared:bool = True):
+        """
+        bShared: readable from a worker process, otherwise a plain dict for a worker thread
+        """
+        self._payload = BaeSharedDict(payload) if bShared else dict(payload)
 
     def getPayload(self):
         return self._payload
@@ -414,33 +1263,117 @@ class BaeWorkerPayload():
     def update(self, key, value):
         self._payload[key] = value
 
-class BaeWorkQueue():
-    def __init__(self, workSize:3):
-        self._queue = multiprocessing.Manager().Queue(workSize)
+    def close(self):
+        if isinstance(self._payload, BaeSharedDict):
+            self._payload.close()
 
-    def getQueue(self):
-        return self._queue
-
-def BaeEncodingTask(payload):
-    while True:
-        
-        if payload['bExclusive'] is True:
-            BaeshadeUtil.resetCursorPos()
-
-        encode = payload['rtQueue'].get()
-        BaeTermDrawPipeline.draw(encode)
+def BaeEncodingTask(payload, rtRing:BaeFrameRing, encodeDesc:Optional[dict] = None, statRing:Optional[BaeFrameRing] = None,
+                    recordDesc:Optional[tuple] = None):
+    """
+    worker loop, write frames from rtRing to terminal
+    encodeDesc: if given, rtRing carries raw uint8 pixels and they are encoded here
+                {'width','height','colorMode','bDiff','bElideSGR','bUseREP','encodeWorkers','sharedBuffers'}
+                sharedBuffers: (shm name, count) of a shared swap chain, rtRing then carries buffer index
+                payload['colorMode'] switches the color mode while running
+    statRing: report BaeTermDrawPipeline._FrameStat of every written frame, dropped when full
+    recordDesc: (path, width, height, BaeRecordCompression), capture written frames there
+    run as a process it is terminated, as a thread it leaves once payload['bQuit'] is set
+    """
+    encoder = None
+    bands = None
+    recorder = BaeFrameRecorder(*recordDesc) if recordDesc is not None else None
+    # frames go out as bytes on the stdout fd, cursor moves in the same system call
+    writer = BaeOutputWriter()
+    home = BaeTermDraw.encodeCursorPos(1, 1)
+    origin = BaeTermDraw.encodeCursorPos(BaeTermDrawPipeline._FrameOrigin, 1)
+    makeEncoder = lambda mode : BaeFrameEncoder(mode, bDiff=encodeDesc.get('bDiff',False),
+                                                bElideSGR=encodeDesc.get('bElideSGR',False), bUseREP=encodeDesc.get('bUseREP',False),
+                                                bandEncoder=bands)
+    if encodeDesc is not None:
+        bands = BaeBandEncoder(encodeDesc['encodeWorkers']) if encodeDesc.get('encodeWorkers',0) > 0 else None
+        encoder = makeEncoder(encodeDesc['colorMode'])
+        shape = (encodeDesc['height'], encodeDesc['width'], 3)
+        sharedBuffers = None
+        if encodeDesc.get('sharedBuffers') is not None:
+            name, count = encodeDesc['sharedBuffers']
+            sharedBuffers = np.ndarray((count,) + shape, dtype=np.uint8, buffer=attachSharedMemory('swapchain', name).buf)
+    perfWatch = BaeshadeUtil.Stopwatch()
+
+    # terminate() sends SIGTERM, SystemExit raised there may land in a finalizer and be ignored
+    # so free the band pool here and leave at once
+    # band pool processes inherit the handler, they only leave
+    workerPid = os.getpid()
+    def onTerminate(sig, frame):
+        if os.getpid() != workerPid:
+            os._exit(0)
+        if bands is not None:
+            bands.close()
+        if recorder is not None:
+            recorder.close()
+        os._exit(0)
+    bThread = threading.current_thread() is not threading.main_thread()
+    if not bThread:
+        signal.signal(signal.SIGTERM, onTerminate)
+        # forked after the app set its ctrl+z handler, ctrl+c and ctrl+z reach the whole process group
+        # the app turns both into an exit and terminates us, a worker stopped or interrupted on its own would hang that
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        if hasattr(signal, 'SIGTSTP'):
+            signal.signal(signal.SIGTSTP, signal.SIG_IGN)
+    try:
+        while True:
+
+            item = rtRing.acquireFrame(0.05 if bThread else None)
+            if item is None:
+                if payload.get('bQuit', False):
+                    break
+                continue
+            seq, frame = item
+            acquired = time.perf_counter()
+            if encoder is not None:
+                perfWatch.reset()
+                if payload['colorMode'] != encoder.colorMode:
+                    encoder = makeEncoder(payload['colorMode'])
+                if sharedBuffers is not None:
+                    pixels = sharedBuffers[BaeTermDrawPipeline._BufferIndex.unpack_from(frame)[0]]
+                    overlay = frame[BaeTermDrawPipeline._BufferIndex.size:]
+                else:
+                    size = shape[0] * shape[1] * shape[2]
+                    pixels = np.frombuffer(frame, dtype=np.uint8, count=size).reshape(shape)
+                    overlay = frame[size:]
+                overlay, overlayCells = BaeTermDrawPipeline.unpackOverlay(overlay)
+                encode = encoder.encode(pixels)
+                encoder.invalidate(overlayCells)
+                del pixels
+                # slot and buffer are free once encoded, pipeline can publish next frame while we write
+                rtRing.releaseFrame()
+                encodeTime = perfWatch.stop()
+            else:
+                # already encoded by the pipeline, it times that itself, written from the slot
+                encode = frame
+                overlay = b''
+                encodeTime = 0.0
+
+            perfStrFlush = len(encode) + len(overlay)
+            perfWatch.reset()
+            # exclusive screen starts at home, then the cursor waits at the frame origin
+            # perf text comes with the frame it describes, as overlay
+            prefix = home if payload['bExclusive'] is True else b''
+            writer.write(prefix, encode, overlay, origin)
+            written = time.perf_counter()
+            writeTime = perfWatch.stop()
+            if recorder is not None:
+                # the bytes the terminal got, a replay places its cursor the same way
+                recorder.write(b''.join((prefix, encode, overlay, origin)), written)
+            if encoder is None:
+                rtRing.releaseFrame()
+            if statRing is not None:
+                statRing.put(BaeTermDrawPipeline._FrameStat.pack(seq, acquired, written, encodeTime, writeTime, writer.lastStall, perfStrFlush), False)
+    finally:
+        if bands is not None:
+            bands.close()
+        if recorder is not None:
+            recorder.close()
 
-        perfData = payload['perfData'].get()
-        if perfData.bShowPerf:
-            perfStrFlush = len(encode)
-            BaeTermDrawPipeline.drawStyleText(1, 1, f'fps:{perfData.expectFPS}/{1000 // perfData.frameTime}, Frame:{perfData.frameTime:.2f}, Logic:{perfData.logicTickTime:.2f},'
-                                            f' Draw:{perfData.drawTime:.2f}, Encoding:{payload["_perfSubmitRT"]*1000:.2f}, bandwidth:{perfStrFlush:,}'
-                                            f' \n'
-                                            ,ColorPallette4bit.blue,ColorPallette4bit.black_bg)
-        else:
-            #BaeTermDrawPipeline.drawStyleText(1, 1, f'\n')
-            BaeshadeUtil.resetCursorPos(2,1)
-        
 class BaeFrameCounter:
     def __init__(self):
         self._counter = 0
@@ -475,36 +1408,147 @@ class BaeRenderingTask:
         pass
 
 class BaeTermDrawPipeline:
+
+    # ring payload in zero copy mode: index of the presented swap chain buffer
+    _BufferIndex = struct.Struct('I')
+    # text overlay after pixel payloads: cell count, then (row, col, end col) per cell run
+    _OverlayHeader = struct.Struct('I')
+    _OverlayCells = struct.Struct('iii')
+    # terminal row where frames start
+    _FrameOrigin = 2
+    # worker report per written frame: ring seq, perf_counter when picked up and when written,
+    # encode seconds, write seconds, stall seconds, bytes
+    _FrameStat = struct.Struct('Qdddddq')
+
     def __init__(self, 
                  bufDesc,
                  ):
         """
-        bufDesc: {'width','height','colorMode'}
+        bufDesc: {'width','height','colorMode','storage','bufferCount','clearOnAcquire',
+                  'bDiffEncode','bElideSGR','bUseREP','bEncodeInWorker','encodeWorkers','shaderWorkers','overlaySize','perfWindow','sink',
+                  'record','recordCompression','presentMode','bWriterThread'}
+        bufferCount: number of backbuffers in the swap chain
+        clearOnAcquire: BaeVec3d, clear every backbuffer to it before drawing
+        bDiffEncode: only send cells changed since last frame, require numpy
+        bElideSGR: skip color sequences the terminal already has, require numpy
+        bUseREP: compress identical cells with REP, require numpy
+        bEncodeInWorker: publish raw pixels, encode them in the worker process, require numpy
+        encodeWorkers: encode full frames as row bands on a pool of that many processes, require numpy
+        shaderWorkers: run per-pixel shaders tile by tile on a pool of that many processes
+        overlaySize: bytes reserved per frame for text written over it, default 4096
+        perfWindow: frames kept for perf percentiles, default 600
+        sink: BaeFrameSink, run headless: frames are encoded here and written to it,
+              no worker process and no terminal output, bEncodeInWorker is ignored
+        record: capture path, every frame written is recorded with its time, see BaeFrameReplay
+        recordCompression: BaeRecordCompression of the capture, default raw
+        presentMode: BaePresentMode, default Strict if bStrict is set else Drop
+                     Mailbox keeps the latest frame, diff encoding then has to run in the worker
+        bWriterThread: run the worker on a thread of this process instead of a process of its own
+        the worker starts with the first frame presented
         """
         self._buff = None
         self._buffCount = bufDesc.get('bufferCount',3)
         self._strictMode = bufDesc.get('bStrict',False)
-        self._backbuffer = [BaeBuffer(bufDesc['width'],bufDesc['height'],bufDesc.get('colorMode', BaeColorMode.Color24Bits))] * self._buffCount
+        self._presentMode = bufDesc.get('presentMode', BaePresentMode.Strict if self._strictMode else BaePresentMode.Drop)
+        self._strictMode = self._presentMode == BaePresentMode.Strict
+        self._sink = bufDesc.get('sink', None)
+        self._bHeadless = self._sink is not None
+        self._bEncodeInWorker = bufDesc.get('bEncodeInWorker',False) and not self._bHeadless
+        colorMode = bufDesc.get('colorMode', BaeColorMode.Color24Bits)
+        encodeDesc = {
+            'width': bufDesc['width'],
+            'height': bufDesc['height'],
+            'colorMode': colorMode,
+            'bDiff': bufDesc.get('bDiffEncode',False),
+            'bElideSGR': bufDesc.get('bElideSGR',False),
+            'bUseREP': bufDesc.get('bUseREP',False),
+            'encodeWorkers': bufDesc.get('encodeWorkers',0),
+        }
+        self._frameEncoder = None
+        self._bandEncoder = None
+        self._shaderPool = BaeShaderPool(bufDesc['shaderWorkers']) if bufDesc.get('shaderWorkers',0) > 0 else None
+        if self._bEncodeInWorker:
+            requireNumpy('bEncodeInWorker')
+            assert BaeTermDraw.supportFrameEncode(colorMode), "Not supported Color mode"
+        elif encodeDesc['bDiff'] or encodeDesc['bElideSGR'] or encodeDesc['bUseREP'] or encodeDesc['encodeWorkers'] > 0:
+            if encodeDesc['encodeWorkers'] > 0:
+                self._bandEncoder = BaeBandEncoder(encodeDesc['encodeWorkers'])
+            self._frameEncoder = BaeFrameEncoder(colorMode, bDiff=encodeDesc['bDiff'],
+                                                 bElideSGR=encodeDesc['bElideSGR'], bUseREP=encodeDesc['bUseREP'],
+                                                 bandEncoder=self._bandEncoder)
+            # a superseded frame never reaches the terminal, the next diff would be based on it
+            assert not (encodeDesc['bDiff'] and self._presentMode == BaePresentMode.Mailbox and not self._bHeadless), \
+                "Mailbox presentation needs bEncodeInWorker to diff encode"
+        storage = bufDesc.get('storage', BaeBufferStorage.PyList)
+        self._encodeDesc = encodeDesc
+        self._storage = storage
+        # quality knobs, see setQuality
+        self._colorMode = colorMode
+        self._renderScale = 1
+        self._scaledBuff = None
+        self._shaderInterval = 1
+        self._shaderCache = {}
+        # worker reads uint8 buffers in place, the ring only carries buffer index
+        self._bZeroCopy = self._bEncodeInWorker and storage == BaeBufferStorage.UInt8
+        self._clearColor = bufDesc.get('clearOnAcquire', None)
+        self._swapChain = BaeSwapChain(self._buffCount, bufDesc['width'], bufDesc['height'], colorMode, storage, self._bZeroCopy)
+        if self._bZeroCopy:
+            encodeDesc['sharedBuffers'] = (self._swapChain.sharedName, self._swapChain.count)
 
         self._frameCounter = BaeFrameCounter()
 
         self._screenMode = False
-        self._primList = [BaeSprite]
-
-        self._rtQueue = BaeWorkQueue(self._buffCount)
-        self._perfData = BaeWorkQueue(self._buffCount)
-        payload = {
-            'rtQueue': self._rtQueue.getQueue(),
-            'bExclusive': self.isExclusiveMode,
-            'perfData': self._perfData.getQueue(),
-            '_perfRenderingTask': 0,
-        }
-        self.workerPayload = BaeWorkerPayload(payload)
-        self.encodeWorker = BaeEncodeWorker(BaeEncodingTask, (self.workerPayload.getPayload(),))
-        self.encodeWorker.run()
+        self._primList = []
+        self._displayList = BaeDisplayList()
+        # text commands of the frame being drawn
+        self._overlay = []
+
+        self._lastFrameBytes = 0
+        self._oversizedFrames = 0
+        perfWindow = bufDesc.get('perfWindow', 600)
+        self._perf = BaePerfRecorder(perfWindow, perfWindow)
+        # latest BaePerfData, drawn over the next frame
+        self._perfData = None
+
+        self._rtRing = None
+        self._statRing = None
+        self.workerPayload = None
+        self.encodeWorker = None
+        self._recorder = None
+        recordDesc = None
+        if bufDesc.get('record') is not None:
+            recordDesc = (bufDesc['record'], bufDesc['width'], bufDesc['height'], bufDesc.get('recordCompression', BaeRecordCompression.Raw))
+        if self._bHeadless:
+            self._recorder = BaeFrameRecorder(*recordDesc) if recordDesc is not None else None
+        else:
+            # frames go through shared memory, no pickling on the way
+            slotCount = self._buffCount
+            if self._bZeroCopy:
+                # keep one buffer out of flight for drawing
+                slotCount = max(1, self._buffCount - 1)
+                slotSize = BaeTermDrawPipeline._BufferIndex.size
+            elif self._bEncodeInWorker:
+                slotSize = bufDesc['width'] * bufDesc['height'] * 3
+            else:
+                # setQuality may switch to true-color later, the largest encoding
+                slotSize = bufDesc.get('frameSlotSize', BaeTermDraw.maxEncodeSize(bufDesc['width'],bufDesc['height'],BaeColorMode.Color24Bits))
+            if self._presentMode == BaePresentMode.Mailbox:
+                self._rtRing = BaeFrameMailbox(slotCount, slotSize + bufDesc.get('overlaySize', 4096))
+            else:
+                self._rtRing = BaeFrameRing(slotCount, slotSize + bufDesc.get('overlaySize', 4096))
+            self._statRing = BaeFrameRing(64, BaeTermDrawPipeline._FrameStat.size)
+            payload = {
+                'bExclusive': self.isExclusiveMode,
+                'colorMode': colorMode,
+            }
+            bThread = bufDesc.get('bWriterThread', False)
+            self.workerPayload = BaeWorkerPayload(payload, not bThread)
+            self.encodeWorker = BaeEncodeWorker(BaeEncodingTask, (self.workerPayload.getPayload(), self._rtRing,
+                                                                  encodeDesc if self._bEncodeInWorker else None, self._statRing, recordDesc),
+                                                bThread)
 
         #bind a default rt
-        self.__bindRenderTaret(self._backbuffer[0], True)
+        self.__bindRenderTaret(self._swapChain.buffer(0), True)
 
 
     def __del__(self):
@@ -513,14 +1557,193 @@ class BaeTermDrawPipeline:
     def shutDown(self):
         if self.encodeWorker is not None:
             self.encodeWorker.stop()
+            self.encodeWorker = None
+        if self.workerPayload is not None:
+            self.workerPayload.close()
+            self.workerPayload = None
+        if self._rtRing is not None:
+            self._rtRing.close()
+            self._rtRing = None
+        if self._statRing is not None:
+            self.pollFrameStats()
+            self._perf.flush()
+            self._statRing.close()
+            self._statRing = None
+        if self._bandEncoder is not None:
+            self._bandEncoder.close()
+            self._bandEncoder = None
+        if self._shaderPool is not None:
+            self._shaderPool.close()
+            self._shaderPool = None
+        if self._swapChain is not None:
+            self._buff = None
+            self._swapChain.close()
+            self._swapChain = None
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
 
     def runShader(self, shader:Callable[[int,int,dict],BaeVec3d]):
-        self.__getBackBuffer().compute(shader)
+        """
+        run shader per pixel, on the shader pool tile by tile if 'shaderWorkers' is set
+        """
+        if self.__reuseShader(shader):
+            return
+
+        if self._shaderPool is None:
+            self.__getBackBuffer().compute(shader)
+        else:
+            buff = self.__getBackBuffer()
+            uniforms = BaeShaderUniforms(buff.virtualSize.X, buff.virtualSize.Y, self._frameCounter.frame())
+            self._shaderPool.compute(buff, shader, uniforms)
+        self.__keepShader(shader)
+
+    def runShaderVectorized(self, shader:Callable[[object,object,BaeShaderUniforms],object]):
+        """
+        run shader once over coordinate arrays of the whole backbuffer, require numpy
+        shader(x, y, uniforms) return a H x W x 3 array
+        """
+        if self.__reuseShader(shader):
+            return
+
+        buff = self.__getBackBuffer()
+        uniforms = BaeShaderUniforms(buff.virtualSize.X, buff.virtualSize.Y, self._frameCounter.frame())
+        buff.computeVectorized(shader, uniforms)
+        self.__keepShader(shader)
+
+    def __reuseShader(self, shader)->bool:
+        """
+        between shader updates write its last output instead of running it
+        """
+        if self._shaderInterval <= 1 or self._frameCounter.frame() % self._shaderInterval == 0:
+            return False
+        buff = self.__getBackBuffer()
+        cache = self._shaderCache.get(shader)
+        if cache is None or cache[0] != (buff.virtualSize.X, buff.virtualSize.Y):
+            return False
+        buff.fillRegion(0, 0, cache[1])
+        return True
+
+    def __keepShader(self, shader):
+        if self._shaderInterval <= 1:
+            return
+        buff = self.__getBackBuffer()
+        pixels = buff.getRegion(0, 0, buff.virtualSize.X, buff.virtualSize.Y)
+        self._shaderCache[shader] = ((buff.virtualSize.X, buff.virtualSize.Y), np.array(pixels) if buff.isArray else pixels)
+
+    @property
+    def quality(self)->dict:
+        """
+        current quality knobs: colorMode, renderScale, shaderInterval
+        """
+        return {'colorMode': self._colorMode, 'renderScale': self._renderScale, 'shaderInterval': self._shaderInterval}
+
+    def setQuality(self, colorMode:Optional[BaeColorMode] = None, renderScale:Optional[int] = None, shaderInterval:Optional[int] = None)->None:
+        """
+        trade image quality for speed while running, None keeps a knob as it is
+        colorMode: encode frames with this BaeColorMode, Color8Bits sends less bytes than Color24Bits
+        renderScale: tasks draw at 1/renderScale of the size, frames are scaled up before encoding
+                     drawing code must use backbufferWidth/backbufferHeight to follow it
+        shaderInterval: run shaders every n-th frame only, their last output is reused between
+        """
+        if colorMode is not None and colorMode != self._colorMode:
+            if self._bEncodeInWorker or self._frameEncoder is not None:
+                assert BaeTermDraw.supportFrameEncode(colorMode), "Not supported Color mode"
+            self._colorMode = colorMode
+            for idx in range(self._swapChain.count):
+                self._swapChain.buffer(idx).setColorMode(colorMode)
+            if self._scaledBuff is not None:
+                self._scaledBuff.setColorMode(colorMode)
+            if self._frameEncoder is not None:
+                desc = self._encodeDesc
+                self._frameEncoder = BaeFrameEncoder(colorMode, bDiff=desc['bDiff'], bElideSGR=desc['bElideSGR'],
+                                                     bUseREP=desc['bUseREP'], bandEncoder=self._bandEncoder)
+            if self.workerPayload is not None:
+                self.workerPayload.update('colorMode', colorMode)
+
+        if renderScale is not None and max(1, renderScale) != self._renderScale:
+            self._renderScale = max(1, renderScale)
+            self._scaledBuff = None
+            if self._renderScale > 1:
+                w = (self._encodeDesc['width'] + self._renderScale - 1) // self._renderScale
+                h = (self._encodeDesc['height'] + self._renderScale - 1) // self._renderScale
+                self._scaledBuff = BaeBuffer(w, h + h % 2, self._colorMode, storage=self._storage)
+
+        if shaderInterval is not None:
+            self._shaderInterval = max(1, shaderInterval)
+            self._shaderCache = {}
+
+    def pollFrameStats(self)->list:
+        """
+        drain worker reports of frames written so far and complete them in perf
+        return list of (ring seq, perf_counter when picked up, perf_counter when written, encode sec, write sec, stall sec, bytes)
+        """
+        stats = []
+        while self._statRing is not None:
+            item = self._statRing.acquireFrame(0)
+            if item is None:
+                break
+            stats.append(BaeTermDrawPipeline._FrameStat.unpack(item[1]))
+            self._statRing.releaseFrame()
+        for seq, acquired, written, encodeTime, writeTime, stallTime, size in stats:
+            if self._presentMode == BaePresentMode.Mailbox:
+                # the worker takes frames in order, those it skipped were replaced
+                self._perf.supersede(seq)
+            self._perf.completeFrame(seq, acquired, encodeTime if self._bEncodeInWorker else None, writeTime, size, stallTime, written)
+        if len(stats) > 0:
+            self._lastFrameBytes = stats[-1][6]
+        return stats
+
+    @property
+    def perf(self)->BaePerfRecorder:
+        """
+        per frame stage timings, see BaePerfRecorder
+        """
+        return self._perf
+
+    @property
+    def oversizedFrames(self)->int:
+        """
+        frames dropped because they did not fit a ring slot, e.g. text over overlaySize
+        """
+        return self._oversizedFrames
+
+    @property
+    def presentMode(self):
+        return self._presentMode
+
+    @property
+    def supersededFrames(self)->int:
+        """
+        frames replaced by a newer one before the worker took them, Mailbox mode only
+        """
+        return self._rtRing.superseded if isinstance(self._rtRing, BaeFrameMailbox) else 0
+
+    @property
+    def lastFrameBytes(self)->int:
+        """
+        bytes of the last frame written to the terminal
+        """
+        return self._lastFrameBytes
 
     @property
     def isExclusiveMode(self):
         return self._screenMode
 
+    @property
+    def isHeadless(self)->bool:
+        """
+        frames go to a BaeFrameSink instead of the terminal
+        """
+        return self._bHeadless
+
+    @property
+    def sink(self)->Optional[BaeFrameSink]:
+        return self._sink
+
     @property
     def backbuffer(self):
         return self._buff.virtualBuffer
@@ -535,7 +1758,7 @@ class BaeTermDrawPipeline:
 
     @property
     def colorMode(self):
-        return self._buff.colorMode
+        return self._colorMode
 
     def useExclusiveScreen(self,bExclusive:bool):
         """
@@ -543,37 +1766,152 @@ class BaeTermDrawPipeline:
         false back to main screen
         """
         self._screenMode = bExclusive
+        if self._frameEncoder is not None:
+            self._frameEncoder.reset()
+        if self._bHeadless:
+            return
         BaeshadeUtil.clearScreen()
         BaeshadeUtil.ExclusiveScreen(bExclusive)
         BaeshadeUtil.showCursor(bExclusive == False)
         if bExclusive == False:
             BaeshadeUtil.resetCursorPos()
 
-    def submitRT(self, encodedData):
+    def submitRT(self, encodedData)->bool:
         """
-        submit data to renering worker, if queue is full mean the term is busy, drop the data
+        submit data to renering worker, if ring is full mean the term is busy, drop the data
+        in Mailbox present mode it replaces the frame still waiting instead
+        return false if the data is dropped
         """
-        try:
-            if self._strictMode: 
-                self._rtQueue.getQueue().put(encodedData)
-            else:
-                self._rtQueue.getQueue().put_nowait(encodedData)
-        except (queue.Full, queue.Empty):
-            pass
+        if isinstance(encodedData, str):
+            encodedData = encodedData.encode()
+        if self._bHeadless:
+            self._sink.write(encodedData)
+            if self._recorder is not None:
+                self._recorder.write(encodedData)
+            return True
+        self.encodeWorker.run()
+        if not self.__fitSlot(len(encodedData)):
+            return False
+        return self._rtRing.put(encodedData, self._strictMode)
+
+    def __fitSlot(self, size:int)->bool:
+        """
+        false if a frame of size bytes can't go in a ring slot, it is then dropped and counted
+        """
+        if size <= self._rtRing.slotSize:
+            return True
+        self._oversizedFrames += 1
+        return False
+
+    def submitBufferIndex(self, idx:int, overlay:bytes = b'')->Optional[int]:
+        """
+        publish a shared swap chain buffer for the worker to read in place
+        overlay: packed text written over the frame, see packOverlay
+        return the frame sequence number, or None if dropped
+        """
+        size = BaeTermDrawPipeline._BufferIndex.size
+        if not self.__fitSlot(size + len(overlay)):
+            return None
+        view = self._rtRing.beginWrite(self._strictMode)
+        if view is None:
+            return None
+        BaeTermDrawPipeline._BufferIndex.pack_into(view, 0, idx)
+        view[size:size + len(overlay)] = overlay
+        view.release()
+        return self._rtRing.endWrite(size + len(overlay))
+
+    def submitPixels(self, buff:BaeBuffer, overlay:bytes = b'')->bool:
+        """
+        publish quantified pixels of buff for the worker to encode, drop them like submitRT
+        overlay: packed text written over the frame, see packOverlay
+        """
+        size = buff.virtualSize.X * buff.virtualSize.Y * 3
+        if not self.__fitSlot(size + len(overlay)):
+            return False
+        view = self._rtRing.beginWrite(self._strictMode)
+        if view is None:
+            return False
+        slot = np.frombuffer(view, dtype=np.uint8, count=size).reshape(buff.virtualSize.Y, buff.virtualSize.X, 3)
+        slot[:] = BaeTermDraw.quantifyArray(buff.asArray())
+        del slot
+        view[size:size + len(overlay)] = overlay
+        view.release()
+        self._rtRing.endWrite(size + len(overlay))
+        return True
+
+    @staticmethod
+    def encodeOverlay(texts:list):
+        """
+        texts: (x, y, txt, fontColor, bgColor, style) from BaeDisplayList.execute
+        return (encoded bytes, cells covered as (frame row, first col, end col))
+        """
+        encodeBuff = []
+        cells = []
+        for x, y, txt, fontColor, bgColor, style in texts:
+            encodeBuff.append(BaeTermDraw.encodeCursorPos(y, x))
+            encodeBuff.append(f'{BaeTermDraw.encodeTextStyle(fontColor, bgColor, style)}{txt}{BaeTermDraw.encodeResetToken()}'.encode())
+            # a new line goes back to the first column
+            for idx, line in enumerate(txt.split('\n')):
+                col = x - 1 if idx == 0 else 0
+                cells.append((y + idx - BaeTermDrawPipeline._FrameOrigin, col, col + len(line)))
+        return b''.join(encodeBuff), cells
+
+    @staticmethod
+    def packOverlay(encode:bytes, cells:list)->bytes:
+        """
+        overlay as sent after a frame to the worker: cell count, cells, then the bytes
+        """
+        if len(encode) == 0:
+            return b''
+        packed = [BaeTermDrawPipeline._OverlayHeader.pack(len(cells))]
+        packed.extend(BaeTermDrawPipeline._OverlayCells.pack(*cell) for cell in cells)
+        packed.append(encode)
+        return b''.join(packed)
+
+    @staticmethod
+    def unpackOverlay(data):
+        """
+        reverse of packOverlay, return (encoded bytes, cells)
+        """
+        if len(data) == 0:
+            return b'', []
+        count = BaeTermDrawPipeline._OverlayHeader.unpack_from(data, 0)[0]
+        offset = BaeTermDrawPipeline._OverlayHeader.size
+        cells = []
+        for _ in range(count):
+            cells.append(BaeTermDrawPipeline._OverlayCells.unpack_from(data, offset))
+            offset += BaeTermDrawPipeline._OverlayCells.size
+        return bytes(data[offset:]), cells
 
     
     def submitPerfData(self, perfData):
-        try:
-            if self._strictMode: 
-                self._perfData.getQueue().put(perfData)
-            else:
-                self._perfData.getQueue().put_nowait(perfData)
-        except (queue.Full, queue.Empty):
-            pass
+        """
+        perf data shown over the next frame when its bShowPerf is set
+        """
+        self._perfData = perfData
+
+    def __perfOverlay(self)->Optional[tuple]:
+        """
+        perf line as overlay text of the frame being presented
+        """
+        perfData = self._perfData
+        if perfData is None or not perfData.bShowPerf:
+            return None
+        fps = 1000 / perfData.frameTime if perfData.frameTime > 0 else 0
+        last = self._perf.lastFrame or {}
+        txt = (f'#{self._perf.seq} fps:{perfData.expectFPS}/{fps:.0f}, Frame:{perfData.frameTime:.2f} (p95 {self._perf.percentile("frame", 95):.2f}),'
+               f' Logic:{perfData.logicTickTime:.2f}, Draw:{perfData.drawTime:.2f}, Encoding:{last.get("encode", 0.0):.2f},'
+               f' bandwidth:{last.get("bytes", 0):,} ')
+        if self._presentMode == BaePresentMode.Mailbox:
+            txt += f'Latency:{last.get("latency", 0.0):.2f}, Superseded:{self.supersededFrames} '
+        return (1, 1, txt, ColorPallette4bit.blue, ColorPallette4bit.black_bg, 0)
 
     def __getBackBuffer(self):
-        idx = self._frameCounter.frame() % self._buffCount
-        return self._backbuffer[idx]
+        return self._buff
+
+    @property
+    def swapChain(self)->BaeSwapChain:
+        return self._swapChain
 
     def __bindRenderTaret(self, buf : BaeBuffer, bNeedInvalidBuffer:bool = False):
         """
@@ -589,6 +1927,21 @@ class BaeTermDrawPipeline:
         if buffstr is not None:
             BaeshadeUtil.output(buffstr)
 
+    @property
+    def displayList(self)->BaeDisplayList:
+        """
+        commands recorded here are executed after all tasks of the frame ran
+        """
+        return self._displayList
+
+    def executeDisplayList(self, dl:BaeDisplayList, delta:float = 0.0)->None:
+        """
+        draw a display list now, its text goes over the current frame
+        dl is kept, so a list recorded once can be executed every frame
+        """
+        uniforms = BaeShaderUniforms(self._buff.virtualSize.X, self._buff.virtualSize.Y, self._frameCounter.frame())
+        self._overlay.extend(dl.execute(self._buff, delta, uniforms))
+
     def addPrimtive(self, prim:BaeSprite):
         self._primList.append(prim)
 
@@ -602,8 +1955,6 @@ class BaeTermDrawPipeline:
     def __drawPrimitive(self, delta:float):
         #_buff as Backgournd, not need update
         renderTarget = self._buff
-        rtH = renderTarget.virtualSize.Y
-        rtW = renderTarget.virtualSize.X
 
         # draw dynamic primitives, not need really write to backbuffer
         for p in self._primList:
@@ -611,56 +1962,118 @@ class BaeTermDrawPipeline:
             if isinstance(p,BaeSprite):
                 #get corresponding frame
                 bmp = p.playAtRate(delta)
-                bmp_size = bmp.virtualSize
-                #generate encode, don't need write to bg
                 pos = p.Pos
-
-                for x in range(bmp_size.X):
-                    for y in range(bmp_size.Y):
-                        col = bmp.getEffectPixel(x,y)
-                        if col is not None:
-                            renderTarget.fillAt(round(pos.X + x), round(pos.Y + y),col)
+                # copy opaque spans, cached per frame of the sprite
+                renderTarget.blit(bmp, round(pos.X), round(pos.Y))
 
     async def present(self, delta=0.0, tasklist:Optional[list[BaeRenderingTask]]=None):
         """
         output backbuffer to terminal, internal use only
         """
+        perf = self._perf
+        presentWatch = BaeshadeUtil.Stopwatch()
         self._frameCounter.Increment()
+        self.pollFrameStats()
+        # the worker starts with the first frame, so a pipeline is cheap to create
+        if self.encodeWorker is not None:
+            self.encodeWorker.run()
 
-        
-        # bind current working backbuffer
-        self.__bindRenderTaret(self.__getBackBuffer())
+        # bind current working backbuffer, in zero copy mode wait the worker to give one back
+        consumed = (lambda : self._rtRing.consumed) if self._bZeroCopy else None
+        backIdx, backBuff = self._swapChain.acquire(consumed, self._clearColor)
+        self.__bindRenderTaret(backBuff)
+        if self._scaledBuff is not None:
+            # tasks draw at reduced size, scaled up before encoding
+            if self._clearColor is not None:
+                self._scaledBuff.clear(self._clearColor)
+            self.__bindRenderTaret(self._scaledBuff)
 
 
         # do rendering work
         perfWatch = BaeshadeUtil.Stopwatch()
         for work in tasklist:
+            perfWatch.reset()
             work(delta)
-
-        self.workerPayload.update('_perfRenderingTask', perfWatch.stop())
+            perf.record(f'task.{type(work).__name__}', perfWatch.stop() * 1000)
 
         perfWatch.reset()
+        if len(self._displayList) > 0:
+            self.executeDisplayList(self._displayList, delta)
+            self._displayList.clear()
+
+        if self._scaledBuff is not None:
+            backBuff.upscale(self._scaledBuff, self._renderScale)
+            self.__bindRenderTaret(backBuff)
+        perf.record('displayList', perfWatch.stop() * 1000)
+
+        perfText = self.__perfOverlay()
+        if perfText is not None:
+            self._overlay.append(perfText)
+        overlay, overlayCells = BaeTermDrawPipeline.encodeOverlay(self._overlay)
+        self._overlay = []
         # encode buffers and submit draw
-        #if queue is full, wait here
-        self.submitRT(self.__getBackBuffer().getEncodeBuffer())
-        self.workerPayload.update('_perfSubmitRT', perfWatch.stop())
+        #if queue is full, wait here, drop the frame, or replace the waiting one, see BaePresentMode
+        fence = None
+        ringSeq = None
+        bSubmitted = False
+        if self._bZeroCopy:
+            perfWatch.reset()
+            published = time.perf_counter()
+            fence = ringSeq = self.submitBufferIndex(backIdx, BaeTermDrawPipeline.packOverlay(overlay, overlayCells))
+            if ringSeq is not None and isinstance(self._rtRing, BaeFrameMailbox) and self._rtRing.replaced >= 0:
+                # the frame replaced in the mailbox is never read, its buffer is free to draw again
+                self._swapChain.retireFence(self._rtRing.replaced)
+            perf.record('submit', perfWatch.stop() * 1000)
+        elif self._bEncodeInWorker:
+            perfWatch.reset()
+            published = time.perf_counter()
+            if self.submitPixels(self.__getBackBuffer(), BaeTermDrawPipeline.packOverlay(overlay, overlayCells)):
+                ringSeq = self._rtRing.published - 1
+            perf.record('submit', perfWatch.stop() * 1000)
+        else:
+            perfWatch.reset()
+            buff = self.__getBackBuffer()
+            if self._frameEncoder is not None:
+                encode = self._frameEncoder.encode(buff.asArray(), buff.clearColor, buff.touchedRows)
+            else:
+                encode = buff.getEncodeBytes()
+            if self._bHeadless:
+                # no worker places the cursor, every frame starts at the frame origin
+                encode = BaeTermDraw.encodeCursorPos(BaeTermDrawPipeline._FrameOrigin, 1) + encode
+            perf.record('encode', perfWatch.stop() * 1000)
+
+            perfWatch.reset()
+            published = time.perf_counter()
+            if self.submitRT(encode + overlay):
+                bSubmitted = True
+                if not self._bHeadless:
+                    ringSeq = self._rtRing.published - 1
+                if self._frameEncoder is not None:
+                    self._frameEncoder.invalidate(overlayCells)
+            elif self._frameEncoder is not None:
+                # terminal didn't get it, the next diff has nothing to base on
+                self._frameEncoder.reset()
+            if self._bHeadless:
+                # the sink is the terminal write of a headless frame
+                perf.record('write', perfWatch.stop() * 1000)
+                perf.record('bytes', len(encode) + len(overlay))
+                self._lastFrameBytes = len(encode) + len(overlay)
+            else:
+                perf.record('submit', perfWatch.stop() * 1000)
+        self._swapChain.present(backIdx, fence)
+        perf.record('present', presentWatch.stop() * 1000)
+        perf.endFrame(ringSeq, published, bSubmitted)
 
 
 
     def __encodeRT(self,delta=0.0):
-        if self._buff.isValid is False:
-            BaeTermDrawPipeline.draw(self._buff.getEncodeBuffer())            
-        else:
-            BaeTermDrawPipeline.draw(self._buff._cache)
+        BaeTermDrawPipeline.draw(self._buff.getEncodeBuffer())
 
     def clearScene(self,clrColor:BaeVec3d):
         """
         clear backbuffer to clrColor
-        Note: low performance
         """
-        for row in range(self.backbufferHeight):
-            for col in range(self.backbufferWidth):
-                self.drawPixel(col,row, clrColor)
+        self._buff.clear(clrColor)
 
     def __clampInBuffer(self,pt:BaeVec2d):
         return BaeVec2d(BaeMathUtil.round(BaeMathUtil.clamp(pt.X, 0, self.backbufferWidth)), BaeMathUtil.round(BaeMathUtil.clamp(pt.Y, 0, self.backbufferHeight)))
@@ -687,14 +2100,7 @@ class BaeTermDrawPipeline:
 
     def drawSolidCircle2D(self, center:BaeVec2d, r:float, color:BaeVec3d)->None:
         c = self.__clampInBuffer(center)
-        bw = self.backbufferWidth
-        bh = self.backbufferHeight
-        for row in range(bh):
-            for col in range(bw):
-                dist = BaeVec2d(col,row) - c
-                dist = BaeVec2d.Dot(dist,dist)
-                if dist <= r*r:
-                    self.drawPixel(col,row,color)
+        BaeRaster.circle(self._buff, c.X, c.Y, r, color)
 
     def drawLine2D(self, start:BaeVec2d, end:BaeVec2d, color:BaeVec3d)->None:
         """
@@ -705,34 +2111,37 @@ class BaeTermDrawPipeline:
         """
         
         #clamp to safe zone
+        s = self.__clampInBuffer(start)
+        e = self.__clampInBuffer(end)
+        BaeRaster.ddaLine(self._buff, s.X, s.Y, e.X, e.Y, color)
 
-        sx = BaeMathUtil.round(BaeMathUtil.clamp(start.X, 0, self.backbufferWidth))
-        sy = BaeMathUtil.round(BaeMathUtil.clamp(start.Y, 0, self.backbufferHeight))
-
-        ex = BaeMathUtil.round(BaeMathUtil.clamp(end.X, 0, self.backbufferWidth))
-        ey = BaeMathUtil.round(BaeMathUtil.clamp(end.Y, 0, self.backbufferHeight))
+    def drawThickLine2D(self, start:BaeVec2d, end:BaeVec2d, thickness:float, color:BaeVec3d)->None:
+        """
+        draw a line segment with both ends, thickness <= 1 is a Bresenham line
+        """
+        BaeRaster.thickLine(self._buff, start.X, start.Y, end.X, end.Y, thickness, color)
 
-        # simple DDA
-        dx = ex - sx
-        dy = ey - sy
-        
-        steps = abs(dx) if abs(dx) > abs(dy) else abs(dy)
+    def drawRect2D(self, pos:BaeVec2d, size:BaeVec2d, color:BaeVec3d, bFill:bool = True)->None:
+        """
+        draw an axis aligned rect, only its border when bFill is false
+        """
+        BaeRaster.rect(self._buff, int(pos.X), int(pos.Y), int(size.X), int(size.Y), color, bFill)
 
-        if steps == 0:
-            return
+    def drawSolidTriangle2D(self, a:BaeVec2d, b:BaeVec2d, c:BaeVec2d, color:BaeVec3d)->None:
+        BaeRaster.triangle(self._buff, (a.X, a.Y), (b.X, b.Y), (c.X, c.Y), color)
 
-        incX = dx / float(steps)
-        incY = dy / float(steps)
-        
-        ptX = sx
-        ptY = sy
-        for x in range(steps):
-            self.drawPixel(int(ptX),int(ptY),color)
-            ptX += incX
-            ptY += incY
+    def drawSolidPolygon2D(self, points:list[BaeVec2d], color:BaeVec3d)->None:
+        BaeRaster.polygon(self._buff, [(p.X, p.Y) for p in points], color)
             
 class BaeTermDraw:
 
+    # SGR text around the numeric parameters of one cell, see encodePixel
+    _CellTemplates = {
+        BaeColorMode.Color24Bits: ('\x1b[48;2;', ';', ';', 'm\x1b[38;2;', ';', ';', 'm▀'),
+        BaeColorMode.Color8Bits: ('\x1b[48;5;', 'm\x1b[38;5;', 'm▀'),
+    }
+    _frameTables = {}
+
     @staticmethod
     def quantify(rgb : BaeVec3d):
         """
@@ -743,10 +2152,33 @@ class BaeTermDraw:
         b = max(0, min(255,rgb.Z))
         return BaeVec3d(BaeMathUtil.round(r),BaeMathUtil.round(g),BaeMathUtil.round(b))
 
+    @staticmethod
+    def quantifyArray(pixels):
+        """
+        array version of quantify, return a uint8 array
+        """
+        if pixels.dtype == np.uint8:
+            return pixels
+        return np.clip(pixels, 0, 255).astype(np.uint8)
+
     @staticmethod
     def encodeResetToken():
         return '\x1b[0m'
 
+    @staticmethod
+    def encodeCursorPos(row:int, col:int)->bytes:
+        """
+        CUP, 1-based
+        """
+        return b'\x1b[%d;%dH' % (row, col)
+
+    @staticmethod
+    def encodeCursorForward(n:int)->bytes:
+        """
+        CUF, move cursor right n columns
+        """
+        return b'\x1b[%dC' % n
+
     @staticmethod
     def encodeTextStyle(fontColor, bgColor, style:BaeFontStyle = 0)->str:
         encode4bit = lambda f,b : f'\x1b[{f}m\x1b[{b}m'
@@ -802,13 +2234,144 @@ class BaeTermDraw:
         return ''.join(encodeBuff)
 
     @staticmethod
-    def encodeBuffer(buff:BaeBuffer):
+    def maxEncodeSize(w:int, h:int, mode)->int:
+        """
+        upper bound of encoded bytes for a w x h virtual buffer, cursor moves of diff mode included
+        """
+        match mode:
+            case BaeColorMode.Color8Bits:
+                cell = len('\x1b[48;5;255m\x1b[38;5;255m▀'.encode())
+            case _:
+                cell = len('\x1b[48;2;255;255;255m\x1b[38;2;255;255;255m▀'.encode())
+        rows = (h + 1) // 2
+        # every row may start with a CUP and end with a new line
+        return rows * (w * cell + 16) + 16
+
+    @staticmethod
+    def supportFrameEncode(mode)->bool:
+        """
+        true if encodeFrame can handle the color mode
+        """
+        return np is not None and mode in BaeTermDraw._CellTemplates
+
+    @staticmethod
+    def cellCodes(pixels, mode):
+        """
+        quantify a H x W x 3 array and pack every terminal cell into its SGR parameters
+        24-bit: (bg r, bg g, bg b, fg r, fg g, fg b), 8-bit: (bg index, fg index)
+        return a (H/2) x W x N uint8 array
+        """
+        px = BaeTermDraw.quantifyArray(pixels)
+        top = px[0::2]
+        bot = px[1::2]
+        match mode:
+            case BaeColorMode.Color24Bits:
+                return np.concatenate((bot, top), axis=2)
+            case BaeColorMode.Color8Bits:
+                cube = BaeTermDraw.__frameTable(mode)[2]
+                index = lambda p : 16 + cube[p[...,0]] * 36 + cube[p[...,1]] * 6 + cube[p[...,2]]
+                return np.stack((index(bot), index(top)), axis=2).astype(np.uint8)
+            case _:
+                assert False, "Not supported Color mode"
+
+    @staticmethod
+    def __frameTable(mode):
+        """
+        lazy build lookup tables: cell byte template, digit slot offsets, per-value digits and 6x6x6 cube level
+        """
+        table = BaeTermDraw._frameTables.get(mode)
+        if table is not None:
+            return table
+
+        template = bytearray()
+        slots = []
+        for idx, text in enumerate(BaeTermDraw._CellTemplates[mode]):
+            if idx > 0:
+                slots.append(len(template))
+                template += b'\0\0\0'
+            template += text.encode()
+
+        digits = np.zeros((256,3), dtype=np.uint8)
+        keep = np.zeros((256,3), dtype=bool)
+        for v in range(256):
+            d = b'%d' % v
+            digits[v,:len(d)] = list(d)
+            keep[v,:len(d)] = True
+
+        # same as ColorPallette8bit.encodeColor per channel
+        cube = np.array([int(v/255.0 * 5) for v in range(256)], dtype=np.int32)
+
+        table = (np.frombuffer(bytes(template), dtype=np.uint8), slots, cube, digits, keep)
+        BaeTermDraw._frameTables[mode] = table
+        return table
+
+    @staticmethod
+    def encodeCells(codes, mode, bNewLine:bool = True)->bytes:
+        """
+        encode rows of packed cells (see cellCodes) in bulk from per-value byte tables
+        bNewLine: end every row with a new line
+        """
+        template, slots, _, digits, keep = BaeTermDraw.__frameTable(mode)
+        rows, cols = codes.shape[0], codes.shape[1]
+        cw = len(template)
+        lw = cols * cw + (1 if bNewLine else 0)
+
+        out = np.empty((rows, lw), dtype=np.uint8)
+        mask = np.ones((rows, lw), dtype=bool)
+        cells = out[:, :cols*cw].reshape(rows, cols, cw)
+        cellMask = mask[:, :cols*cw].reshape(rows, cols, cw)
+        cells[:] = template
+        for idx, slot in enumerate(slots):
+            value = codes[:, :, idx]
+            cells[:, :, slot:slot+3] = digits[value]
+            cellMask[:, :, slot:slot+3] = keep[value]
+        if bNewLine:
+            out[:, -1] = ord(BAECODEX.NewLine)
+
+        return out[mask].tobytes()
+
+    @staticmethod
+    def encodeFrame(pixels, mode)->bytes:
+        """
+        whole frame version of encodeBuffer, pixels: H x W x 3 array
+        output is the UTF-8 encoding of encodeBuffer
+        """
+        return BaeTermDraw.encodeCells(BaeTermDraw.cellCodes(pixels, mode), mode)
+
+    @staticmethod
+    def encodeRows(buff:BaeBuffer, rows:list[int])->list[bytes]:
+        """
+        encode some physical rows of buffer, each ends with a new line
+        """
+        if len(rows) == 0:
+            return []
+
+        w = buff.virtualSize.X
+        if buff.virtualSize.Y % 2 == 0 and BaeTermDraw.supportFrameEncode(buff.colorMode):
+            if buff.isArray:
+                pixels = buff.virtualBuffer.reshape(-1, 2, w, 3)[rows].reshape(-1, w, 3)
+            else:
+                vb = buff.virtualBuffer
+                pixels = np.array([[(c.X,c.Y,c.Z) for c in vb[r*2+k]] for r in rows for k in (0,1)], dtype=np.float64)
+            newLine = BAECODEX.NewLine.encode()
+            return [encode + newLine for encode in BaeTermDraw.encodeFrame(pixels, buff.colorMode).split(newLine)[:-1]]
+
+        return [(BaeTermDraw.encodeBatchPixels(r*2, 0, w, buff) + BAECODEX.NewLine).encode() for r in rows]
+
+    @staticmethod
+    def encodeBuffer(buff:BaeBuffer, bandEncoder:Optional['BaeBandEncoder'] = None):
         """
         encode buffer to ANSI Esc Code string list for presentation
+        bandEncoder: split the frame in row bands and encode them on its process pool
         """
         w = buff.virtualSize.X
         h = buff.virtualSize.Y
 
+        if h % 2 == 0 and BaeTermDraw.supportFrameEncode(buff.colorMode):
+            if bandEncoder is not None:
+                return bandEncoder.encode(buff.asArray(), buff.colorMode).decode()
+            return BaeTermDraw.encodeFrame(buff.asArray(), buff.colorMode).decode()
+
         encodeBuff=[]
 
         for row in range(0,h,2):
@@ -822,3 +2385,353 @@ class BaeTermDraw:
 
         return ''.join(encodeBuff)
     
+
+
+class BaeFrameEncoder:
+    """
+    stateful frame encoder, remember what was sent to the terminal so that
+    diff mode only resends the cells changed since last frame
+    """
+
+    # longest gap of unchanged cells worth to measure before deciding to jump over it
+    _MaxProbeGap = 8
+
+    _SgrFormats = {
+        BaeColorMode.Color24Bits: (b'\x1b[48;2;%d;%d;%dm', b'\x1b[38;2;%d;%d;%dm'),
+        BaeColorMode.Color8Bits: (b'\x1b[48;5;%dm', b'\x1b[38;5;%dm'),
+    }
+    _UpperHalf = '▀'.encode()
+
+    def __init__(self, mode, bDiff:bool = False, originRow:int = 2, bElideSGR:bool = False, bUseREP:bool = False,
+                 bandEncoder:Optional['BaeBandEncoder'] = None):
+        """
+        mode: BaeColorMode
+        bDiff: only encode changed cells, use cursor movement between them
+        originRow: terminal row where the frame starts (1-based)
+        bElideSGR: skip background/foreground sequences the terminal already has
+        bUseREP: repeat identical cells with REP (CSI n b), not every terminal supports it
+        bandEncoder: encode full frames in parallel row bands
+        """
+        requireNumpy('BaeFrameEncoder')
+        assert BaeTermDraw.supportFrameEncode(mode), "Not supported Color mode"
+        self._mode = mode
+        self._bDiff = bDiff
+        self._origin = originRow
+        self._bElide = bElideSGR
+        self._bREP = bUseREP
+        self._bands = bandEncoder
+        self._prevCodes = None
+        # cells overwritten by something else since last frame, (row, col, end col)
+        self._stale = []
+
+    @property
+    def colorMode(self):
+        return self._mode
+
+    @property
+    def isDiffMode(self) -> bool:
+        return self._bDiff
+
+    def reset(self):
+        """
+        forget the terminal content, next frame will be sent in full
+        call it when a frame is dropped or the screen is cleared
+        """
+        self._prevCodes = None
+        self._stale = []
+
+    def invalidate(self, cells:list)->None:
+        """
+        cells written over the frame, e.g. text, as (row, col, end col)
+        diff mode resends them in the next frame
+        """
+        if self._bDiff:
+            self._stale.extend(cells)
+
+    def encode(self, pixels, clearColor:Optional[BaeVec3d] = None, touchedRows:Optional[set] = None)->bytes:
+        """
+        pixels: H x W x 3 array
+        clearColor, touchedRows: rows not touched hold only clearColor, diff mode skips reading them
+        """
+        if not self._bDiff:
+            return self.__encodeFull(pixels)
+
+        if clearColor is None or touchedRows is None:
+            codes = BaeTermDraw.cellCodes(pixels, self._mode)
+        else:
+            codes = self.__backgroundCodes(pixels, clearColor, touchedRows)
+        prev = self._prevCodes
+        self._prevCodes = codes
+        if prev is None or prev.shape != codes.shape:
+            self._stale = []
+            # key frame, place it absolutely
+            return BaeTermDraw.encodeCursorPos(self._origin, 1) + self.__encodeFull(pixels, codes)
+
+        changed = np.any(codes != prev, axis=2)
+        for row, col, end in self._stale:
+            if 0 <= row < changed.shape[0]:
+                changed[row, max(0, col):end] = True
+        self._stale = []
+        return self.__encodeDiff(codes, changed)
+
+    def __backgroundCodes(self, pixels, clearColor:BaeVec3d, touchedRows:set):
+        """
+        cell codes from the clear color, only touched rows are encoded from pixels
+        """
+        w = pixels.shape[1]
+        blank = np.empty((2, 1, 3), dtype=pixels.dtype)
+        blank[:] = BaeTermDraw.quantifyArray(np.array((clearColor.X,clearColor.Y,clearColor.Z))) if pixels.dtype == np.uint8 else (clearColor.X,clearColor.Y,clearColor.Z)
+        blankCode = BaeTermDraw.cellCodes(blank, self._mode)[0, 0]
+
+        codes = np.empty((pixels.shape[0] // 2, w, blankCode.shape[0]), dtype=blankCode.dtype)
+        codes[:] = blankCode
+        rows = sorted(r for r in touchedRows if r < codes.shape[0])
+        if len(rows) > 0:
+            codes[rows] = BaeTermDraw.cellCodes(pixels.reshape(-1, 2, w, 3)[rows].reshape(-1, w, 3), self._mode)
+        return codes
+
+    def __encodeFull(self, pixels, codes = None)->bytes:
+        if self._bands is not None:
+            return self._bands.encode(pixels, self._mode, self._bElide, self._bREP)
+
+        if codes is None:
+            codes = BaeTermDraw.cellCodes(pixels, self._mode)
+        if not self._bElide and not self._bREP:
+            return BaeTermDraw.encodeCells(codes, self._mode)
+
+        # SGR state is unknown when a frame starts, keep it across rows
+        state = [None, None]
+        newLine = BAECODEX.NewLine.encode()
+        return b''.join([self.__encodeRun(row, state) + newLine for row in codes])
+
+    def __encodeRun(self, cells, state)->bytes:
+        """
+        encode a run of cells in one row
+        state: [bg, fg] SGR parameters last sent to the terminal, updated in place
+        """
+        if not self._bElide and not self._bREP:
+            return BaeTermDraw.encodeCells(cells[np.newaxis], self._mode, False)
+
+        bgFmt, fgFmt = BaeFrameEncoder._SgrFormats[self._mode]
+        upper = BaeFrameEncoder._UpperHalf
+        half = cells.shape[1] // 2
+
+        # split the run where the cell changes
+        bounds = [0] + (np.flatnonzero(np.any(cells[1:] != cells[:-1], axis=1)) + 1).tolist() + [cells.shape[0]]
+        encodeBuff = []
+        for idx, cell in enumerate(cells[bounds[:-1]].tolist()):
+            bg = tuple(cell[:half])
+            fg = tuple(cell[half:])
+            if not self._bElide or bg != state[0]:
+                encodeBuff.append(bgFmt % bg)
+                state[0] = bg
+            if not self._bElide or fg != state[1]:
+                encodeBuff.append(fgFmt % fg)
+                state[1] = fg
+            encodeBuff.append(upper)
+
+            repeat = bounds[idx + 1] - bounds[idx] - 1
+            if repeat > 0:
+                if self._bREP:
+                    rep = b'\x1b[%db' % repeat
+                    encodeBuff.append(rep if len(rep) < len(upper) * repeat else upper * repeat)
+                else:
+                    encodeBuff.append(upper * repeat)
+
+        return b''.join(encodeBuff)
+
+    def __encodeDiff(self, codes, changed)->bytes:
+        """
+        walk runs of changed cells per row, CUP to the first one, then for every
+        gap choose the cheaper of CUF or resending the unchanged cells
+        """
+        state = [None, None]
+        encodeBuff = []
+        for row in np.flatnonzero(changed.any(axis=1)).tolist():
+            cols = np.flatnonzero(changed[row])
+            breaks = np.flatnonzero(np.diff(cols) > 1)
+            starts = [int(cols[0])] + cols[breaks + 1].tolist()
+            ends = cols[breaks].tolist() + [int(cols[-1])]
+
+            encodeBuff.append(BaeTermDraw.encodeCursorPos(self._origin + row, starts[0] + 1))
+            for idx, (start, end) in enumerate(zip(starts, ends)):
+                if idx > 0:
+                    gap = start - ends[idx - 1] - 1
+                    jump = BaeTermDraw.encodeCursorForward(gap)
+                    if gap <= BaeFrameEncoder._MaxProbeGap:
+                        probe = list(state)
+                        resend = self.__encodeRun(codes[row, start-gap:start], probe)
+                        if len(resend) < len(jump):
+                            jump = resend
+                            state[:] = probe
+                    encodeBuff.append(jump)
+                encodeBuff.append(self.__encodeRun(codes[row, start:end+1], state))
+
+        return b''.join(encodeBuff)
+
+
+def BaeBandEncodingTask(task):
+    """
+    pool worker, encode physical rows [start, end) of the frame in shared memory
+    task: (shm name, frame shape, colorMode, start, end, bElideSGR, bUseREP)
+    """
+    name, shape, mode, start, end, bElide, bREP = task
+    pixels = np.ndarray(shape, dtype=np.uint8, buffer=attachSharedMemory('bands', name).buf)
+    band = pixels[start*2:end*2]
+    if bElide or bREP:
+        encode = BaeFrameEncoder(mode, bElideSGR=bElide, bUseREP=bREP).encode(band)
+    else:
+        encode = BaeTermDraw.encodeFrame(band, mode)
+    del band, pixels
+    return encode
+
+class BaeBandEncoder:
+    """
+    encode a frame as horizontal bands of physical rows on a process pool
+    rows end with a new line so bands are independent, results are joined in order
+    """
+
+    def __init__(self, workers:int, bandCount:Optional[int] = None):
+        """
+        workers: pool size
+        bandCount: how many bands a frame is split into, default one per worker
+        """
+        requireNumpy('BaeBandEncoder')
+        self._workers = workers
+        self._bandCount = bandCount if bandCount is not None else workers
+        self._pool = None
+        self._shm = None
+        self._shape = None
+
+    @property
+    def workers(self)->int:
+        return self._workers
+
+    def __prepare(self, shape):
+        if self._shape != shape:
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+            self._shm = shared_memory.SharedMemory(create=True, size=shape[0] * shape[1] * 3)
+            self._shape = shape
+
+        # start pool after the shared memory, so workers share our resource tracker
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self._workers)
+
+    def encode(self, pixels, mode, bElideSGR:bool = False, bUseREP:bool = False)->bytes:
+        """
+        pixels: H x W x 3 array, H must be even
+        """
+        shape = (pixels.shape[0], pixels.shape[1], 3)
+        self.__prepare(shape)
+
+        frame = np.ndarray(shape, dtype=np.uint8, buffer=self._shm.buf)
+        frame[:] = BaeTermDraw.quantifyArray(pixels)
+        del frame
+
+        rows = shape[0] // 2
+        bounds = np.linspace(0, rows, min(self._bandCount, rows) + 1).astype(int).tolist()
+        tasks = [(self._shm.name, shape, mode, bounds[i], bounds[i+1], bElideSGR, bUseREP) for i in range(len(bounds) - 1)]
+        return b''.join(self._pool.map(BaeBandEncodingTask, tasks))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+            self._shape = None
+
+
+def BaeShaderTileTask(task):
+    """
+    pool worker, run a per-pixel shader on tile [x0,x1) x [y0,y1)
+    colors are written as float64 triples into the shared frame
+    task: (shm name, bw, bh, kernel, x0, y0, x1, y1, extra)
+    """
+    name, bw, bh, kernel, x0, y0, x1, y1, extra = task
+    frame = attachSharedMemory('shader', name).buf.cast('d')
+    try:
+        for row in range(y0, y1):
+            for col in range(x0, x1):
+                c = kernel(col, row, extra)
+                idx = (row * bw + col) * 3
+                frame[idx] = c.X
+                frame[idx+1] = c.Y
+                frame[idx+2] = c.Z
+    finally:
+        frame.release()
+
+class BaeShaderPool:
+    """
+    persistent process pool running per-pixel shaders tile by tile
+    kernels must be picklable, e.g. functions defined at module level
+    """
+
+    def __init__(self, workers:int, tileSize:int = 16):
+        """
+        workers: pool size
+        tileSize: tile edge in pixels
+        """
+        self._workers = workers
+        self._tileSize = tileSize
+        self._pool = None
+        self._shm = None
+        self._size = None
+
+    @property
+    def workers(self)->int:
+        return self._workers
+
+    def __prepare(self, bw:int, bh:int):
+        if self._size != (bw, bh):
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+            self._shm = shared_memory.SharedMemory(create=True, size=bw * bh * 3 * 8)
+            self._size = (bw, bh)
+
+        # start pool after the shared memory, so workers share our resource tracker
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self._workers)
+
+    def compute(self, buff:BaeBuffer, kernel:Callable[[int,int,dict],BaeVec3d], uniforms:BaeShaderUniforms):
+        """
+        shade the whole buff, every tile sees the same uniforms
+        """
+        bw = buff.virtualSize.X
+        bh = buff.virtualSize.Y
+        self.__prepare(bw, bh)
+
+        extra = uniforms.asDict()
+        ts = self._tileSize
+        tasks = [(self._shm.name, bw, bh, kernel, x, y, min(x + ts, bw), min(y + ts, bh), extra)
+                 for y in range(0, bh, ts) for x in range(0, bw, ts)]
+        self._pool.map(BaeShaderTileTask, tasks, chunksize=1)
+
+        if np is not None:
+            frame = np.ndarray((bh, bw, 3), dtype=np.float64, buffer=self._shm.buf)
+            buff.fillRegion(0, 0, frame)
+            del frame
+        else:
+            frame = self._shm.buf.cast('d')
+            for row in range(bh):
+                for col in range(bw):
+                    idx = (row * bw + col) * 3
+                    buff.fillAt(col, row, BaeVec3d(frame[idx], frame[idx+1], frame[idx+2]))
+            frame.release()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+            self._size = None
@@ -1,4 +1,6 @@
-from .baeshade import BaeTermDrawPipeline, ColorPallette4bit, BaeRenderingTask
+from .baeshade import BaeTermDrawPipeline, ColorPallette4bit, BaeRenderingTask, BaeColorMode
+from .baeshadeperf import BaePerfRecorder
+from .baeshaderecord import BaeRecordCompression
 from .baeshademath import BaeVec3d
 from .baeshadeutil import BaeshadeUtil
 import time
@@ -29,23 +31,182 @@ class BaePerfData:
         self.drawTime = 0 #scene drawing time, include encoding RT Time
         self.expectFPS = 0 # expected FPS
         self.frameTime = 0 # single frame delta time
+        self.skippedFrames = 0 # frames dropped by the pacer since start
+        self.bytesPerFrame = 0 # bytes of the last frame written to terminal
         self.bShowPerf = False
 
+class BaeFramePacer:
+    """
+    pace frames on absolute deadlines: sleep until the deadline, optionally spin its last moment
+    a loop falling more than one frame behind skips the missed frames instead of catching up
+    """
+
+    def __init__(self, fps:float = 24, spinTime:float = 0.0):
+        """
+        fps: target frame rate
+        spinTime: seconds to busy wait before a deadline, 0 (default) only sleeps and keeps an idle app near 0% CPU
+                  0.001 covers the timer resolution of the event loop for sub-millisecond jitter, at about 3% CPU
+        """
+        self._spin = spinTime
+        self._deadline = None
+        self._skipped = 0
+        self.setFps(fps)
+
+    @property
+    def fps(self)->float:
+        return self._fps
+
+    @property
+    def interval(self)->float:
+        return self._interval
+
+    @property
+    def skippedFrames(self)->int:
+        return self._skipped
+
+    def setFps(self, fps:float)->None:
+        assert fps > 0, "fps must be positive"
+        self._fps = fps
+        self._interval = 1.0 / fps
+
+    def reset(self)->None:
+        """
+        next wait returns right away and starts a new schedule
+        """
+        self._deadline = None
+
+    async def wait(self)->int:
+        """
+        wait for the next frame deadline, return how many frames were skipped to get there
+        """
+        now = time.perf_counter()
+        if self._deadline is None:
+            self._deadline = now
+            return 0
+
+        self._deadline += self._interval
+        skipped = 0
+        if now - self._deadline > self._interval:
+            # too late for this one and the next, drop to the latest deadline
+            skipped = int((now - self._deadline) / self._interval)
+            self._deadline += skipped * self._interval
+            self._skipped += skipped
+
+        sleepTime = self._deadline - now - self._spin
+        if sleepTime > 0:
+            await asyncio.sleep(sleepTime)
+        if self._spin > 0:
+            while time.perf_counter() < self._deadline:
+                pass
+        return skipped
+
+class BaeQualityGovernor:
+    """
+    step image quality down when frames are over budget and back up when there is headroom
+    levels are pipeline setQuality settings from best to cheapest, applied over the starting quality
+    """
+
+    DefaultLevels = [
+        {},
+        {'shaderInterval': 2},
+        {'shaderInterval': 2, 'colorMode': BaeColorMode.Color8Bits},
+        {'shaderInterval': 2, 'colorMode': BaeColorMode.Color8Bits, 'renderScale': 2},
+    ]
+
+    def __init__(self, levels:Optional[list] = None, budgetMs:Optional[float] = None, bytesBudget:Optional[int] = None,
+                 headroom:float = 0.7, downFrames:int = 5, upFrames:int = 60):
+        """
+        levels: list of setQuality kwargs, default DefaultLevels
+        budgetMs: work time per frame (logic + draw), default the frame interval of the target fps
+        bytesBudget: bytes per frame the terminal or link keeps up with, None to ignore
+        headroom: step up only when below headroom * budget
+        downFrames: frames over budget in a row before stepping down
+        upFrames: frames with headroom in a row before stepping up, larger than downFrames for hysteresis
+        """
+        self._levels = levels if levels is not None else BaeQualityGovernor.DefaultLevels
+        self._budgetMs = budgetMs
+        self._bytesBudget = bytesBudget
+        self._headroom = headroom
+        self._downFrames = downFrames
+        self._upFrames = upFrames
+        self._base = {}
+        self._level = 0
+        self._over = 0
+        self._under = 0
+
+    def setBase(self, quality:dict)->None:
+        """
+        starting quality of the pipeline, what level 0 goes back to
+        """
+        self._base = dict(quality)
+
+    @property
+    def level(self)->int:
+        return self._level
+
+    @property
+    def settings(self)->dict:
+        settings = dict(self._base)
+        settings.update(self._levels[self._level])
+        return settings
+
+    def update(self, perfData:BaePerfData)->Optional[dict]:
+        """
+        feed stats of the last frame, return settings of the new level when it changes
+        """
+        budget = self._budgetMs if self._budgetMs is not None else 1000.0 / max(1, perfData.expectFPS)
+        work = perfData.logicTickTime + perfData.drawTime
+        bOver = work > budget
+        bUnder = work < budget * self._headroom
+        if self._bytesBudget is not None:
+            bOver = bOver or perfData.bytesPerFrame > self._bytesBudget
+            bUnder = bUnder and perfData.bytesPerFrame < self._bytesBudget * self._headroom
+
+        self._over = self._over + 1 if bOver else 0
+        self._under = self._under + 1 if bUnder else 0
+
+        step = 0
+        if self._over >= self._downFrames and self._level < len(self._levels) - 1:
+            step = 1
+        elif self._under >= self._upFrames and self._level > 0:
+            step = -1
+        if step == 0:
+            return None
+
+        self._level += step
+        self._over = 0
+        self._under = 0
+        return self.settings
+
 class BaeApp:
-    def __init__(self,renderDesc:dict,tick_func:Callable[[float],None]=None,bShowPerf=False):
-        
-        self._FixedFps = 24
-        self._displayRate = 1.0/self._FixedFps
+    def __init__(self,renderDesc:dict,tick_func:Callable[[float],None]=None,bShowPerf=False,fps:float=24,spinTime:float=0.0,
+                 governor:Optional[BaeQualityGovernor]=None,perfLog:Optional[str]=None,
+                 record:Optional[str]=None,recordCompression:BaeRecordCompression=BaeRecordCompression.Raw):
+        """
+        fps: target frame rate
+        spinTime: see BaeFramePacer
+        governor: adapt rendering quality to load, off by default
+        perfLog: write per frame timings there on exit, CSV if it ends with .csv, JSON lines otherwise
+        record: capture every frame written to the terminal there, replay it with python -m baeshade.baeshadereplay play
+        recordCompression: BaeRecordCompression of the capture
+        """
+        self._governor = governor
+        self._perfLog = perfLog
+        self._pacer = BaeFramePacer(fps, spinTime)
         self._bExit = False
         self._tick = self.__tick if tick_func is None else tick_func
         self._frameTimer = None
         self._tickTimer = None
         
         self._perfData = BaePerfData()
-        self._perfData.expectFPS = self._FixedFps
+        self._perfData.expectFPS = fps
         self._perfData.bShowPerf = bShowPerf
 
+        if record is not None:
+            renderDesc = dict(renderDesc, record=record, recordCompression=recordCompression)
         self.attachRender(BaeTermDrawPipeline(renderDesc))
+        if governor is not None:
+            governor.setBase(self.__renderPipe.quality)
 
         if platform.system() != 'Windows':
             #handle ctrl+z
@@ -71,8 +232,12 @@ class BaeApp:
     def __exitApp(self):
         # back to previous terminal mode
         self.__renderPipe.useExclusiveScreen(False)
-        BaeshadeUtil.restoreScreen()
+        if not self.__renderPipe.isHeadless:
+            BaeshadeUtil.restoreScreen()
         self.__renderPipe.shutDown()
+        if self._perfLog is not None:
+            with open(self._perfLog, 'w', newline='') as fp:
+                self.perf.dumpFrames(fp, 'csv' if self._perfLog.endswith('.csv') else 'jsonl')
 
     def __prepareRunApp(self):
 
@@ -87,31 +252,46 @@ class BaeApp:
         print('pressed ctrl+z')
         self.requestExit()
 
+    @property
+    def perf(self)->BaePerfRecorder:
+        """
+        per frame stage timings of the pipeline
+        """
+        return self.__renderPipe.perf
+
     @property
     def LimitFPS(self):
-        return self._FixedFps
+        return self._pacer.fps
+
+    def setLimitFPS(self, fps:float):
+        self._pacer.setFps(fps)
+        self._perfData.expectFPS = fps
 
 
     async def __Loop(self):
-        
-        delta = self._frameTimer.last()
-        self._perfData.frameTime = delta * 1000 # last frame time
 
-        waitTimeSec = max(0.0,self._displayRate - delta)
-        delayTime = waitTimeSec
-        
-        while delayTime > 0:
-            self._tickTimer.reset()
-            await asyncio.sleep(0.001)
-            delayTime -= self._tickTimer.stop()
+        await self._pacer.wait()
+        self._perfData.skippedFrames = self._pacer.skippedFrames
+
+        # time since last frame started
+        delta = self._frameTimer.last()
+        self._perfData.frameTime = delta * 1000
+        self.perf.record('frame', self._perfData.frameTime)
 
         self._tickTimer.reset()
-        await self._tick(delta + waitTimeSec)
+        await self._tick(delta)
         self._perfData.logicTickTime = self._tickTimer.stop() * 1000
+        self.perf.record('logic', self._perfData.logicTickTime)
 
         self._tickTimer.reset()
         await self.__renderPipe.present(delta, self._renderingTask)
         self._perfData.drawTime = self._tickTimer.stop() * 1000
+        self._perfData.bytesPerFrame = self.__renderPipe.lastFrameBytes
+
+        if self._governor is not None:
+            settings = self._governor.update(self._perfData)
+            if settings is not None:
+                self.__renderPipe.setQuality(**settings)
 
         # draw perf stat
         self.__renderPipe.submitPerfData(self._perfData)
@@ -0,0 +1,379 @@
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import datetime
+import platform
+import threading
+import multiprocessing
+from typing import Optional, Callable
+
+from .baeshade import BaeBuffer, BaeBufferStorage, BaeColorMode, BaeSprite, BaeTermDraw, BaeFrameEncoder
+from .baeshademath import BaeVec3d
+from .baeshaderaster import BaeRaster
+from .baeshadeipc import BaeFrameRing, BaeFrameMailbox
+from .baeshadeperf import BaePerfWindow
+from .baeshadeutil import BaeshadeUtil
+from .baeshadeoutput import BaeOutputWriter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+"""
+headless benchmarks of the hot paths, no terminal needed
+python -m baeshade.baeshadebench --out report.json --baseline baseline.json
+"""
+
+class BaeBenchCase:
+    """
+    one measured operation
+    setup() returns the state run(state) works on, run may return bytes produced per call
+    """
+
+    def __init__(self, name:str, run:Callable, setup:Optional[Callable] = None, teardown:Optional[Callable] = None, params:Optional[dict] = None):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.teardown = teardown
+        self.params = params if params is not None else {}
+
+class BaeBench:
+    """
+    run cases and build a report, compare reports against a baseline
+    report: {'version', 'meta', 'results': {name: {'unit','runs','median','mean','p95','min','max','bytes','mbps','params'}}}
+    """
+
+    ReportVersion = 1
+
+    def __init__(self, minTime:float = 0.3, minRuns:int = 5, maxRuns:int = 500):
+        """
+        minTime: seconds each case runs at least
+        minRuns, maxRuns: bounds on measured calls per case
+        """
+        self._cases = []
+        self._minTime = minTime
+        self._minRuns = minRuns
+        self._maxRuns = maxRuns
+
+    def add(self, case:BaeBenchCase)->None:
+        self._cases.append(case)
+
+    @property
+    def names(self)->list:
+        return [case.name for case in self._cases]
+
+    def measure(self, case:BaeBenchCase)->dict:
+        state = case.setup() if case.setup is not None else None
+        try:
+            # warm up, fills caches a real frame loop would have warm too
+            produced = case.run(state)
+            window = BaePerfWindow(self._maxRuns)
+            watch = BaeshadeUtil.Stopwatch()
+            start = time.perf_counter()
+            while window.count < self._maxRuns:
+                watch.reset()
+                case.run(state)
+                window.add(watch.stop() * 1000)
+                if window.count >= self._minRuns and time.perf_counter() - start >= self._minTime:
+                    break
+        finally:
+            if case.teardown is not None:
+                case.teardown(state)
+
+        stats = window.summary()
+        result = {
+            'unit': 'ms',
+            'runs': stats['count'],
+            'median': stats['p50'],
+            'mean': stats['mean'],
+            'p95': stats['p95'],
+            'min': window.percentile(0),
+            'max': stats['max'],
+            'params': case.params,
+        }
+        if isinstance(produced, int) and produced > 0:
+            result['bytes'] = produced
+            result['mbps'] = produced / (stats['p50'] / 1000) / 1e6 if stats['p50'] > 0 else 0.0
+        return result
+
+    def run(self, pattern:Optional[str] = None, log=None)->dict:
+        """
+        run every case whose name contains pattern, log: text stream for progress
+        """
+        results = {}
+        for case in self._cases:
+            if pattern is not None and pattern not in case.name:
+                continue
+            results[case.name] = self.measure(case)
+            if log is not None:
+                log.write(f'{case.name:<40} {results[case.name]["median"]:10.3f} ms\n')
+                log.flush()
+        return {
+            'version': BaeBench.ReportVersion,
+            'meta': BaeBench.meta(),
+            'results': results,
+        }
+
+    @staticmethod
+    def meta()->dict:
+        return {
+            'time': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'numpy': np.__version__ if np is not None else None,
+        }
+
+    @staticmethod
+    def compare(report:dict, baseline:dict, threshold:float = 0.1)->list:
+        """
+        median of every case in both reports
+        return list of (name, baseline ms, current ms, ratio, verdict), verdict is 'slower', 'faster' or 'same'
+        """
+        rows = []
+        base = baseline.get('results', {})
+        for name, result in report.get('results', {}).items():
+            if name not in base:
+                continue
+            before, after = base[name]['median'], result['median']
+            ratio = after / before if before > 0 else 1.0
+            verdict = 'slower' if ratio > 1 + threshold else 'faster' if ratio < 1 - threshold else 'same'
+            rows.append((name, before, after, ratio, verdict))
+        return rows
+
+    @staticmethod
+    def formatCompare(rows:list)->str:
+        lines = [f'{"case":<40} {"baseline":>10} {"current":>10} {"ratio":>7}']
+        for name, before, after, ratio, verdict in rows:
+            lines.append(f'{name:<40} {before:10.3f} {after:10.3f} {ratio:7.2f}  {verdict}')
+        return '\n'.join(lines)
+
+def _randomBuffer(w:int, h:int, mode:BaeColorMode, storage:BaeBufferStorage, seed:int = 7)->BaeBuffer:
+    buff = BaeBuffer(w, h, mode, storage=storage)
+    rnd = random.Random(seed)
+    for y in range(h):
+        for x in range(w):
+            buff.fillAt(x, y, BaeVec3d(rnd.randrange(256), rnd.randrange(256), rnd.randrange(256)))
+    return buff
+
+def _encodeCase(w:int, h:int, mode:BaeColorMode, storage:BaeBufferStorage)->BaeBenchCase:
+    return BaeBenchCase(f'encode.{mode()}.{storage()}.{w}x{h}',
+                        lambda buff : len(BaeTermDraw.encodeBuffer(buff).encode()),
+                        lambda : _randomBuffer(w, h, mode, storage),
+                        params={'width': w, 'height': h, 'colorMode': mode(), 'storage': storage()})
+
+def _diffCase(w:int, h:int, mode:BaeColorMode)->BaeBenchCase:
+    """
+    frame encoder in diff mode, a small rect moves over a still background
+    """
+    def setup():
+        buff = _randomBuffer(w, h, mode, BaeBufferStorage.UInt8)
+        return {'buff': buff, 'encoder': BaeFrameEncoder(mode, bDiff=True, bElideSGR=True), 'frame': 0}
+    def run(state):
+        buff = state['buff']
+        state['frame'] += 1
+        x = state['frame'] % (w - 8)
+        buff.fillRect(x, h // 2, 8, 8, BaeVec3d(255, 255, 255))
+        encode = state['encoder'].encode(buff.asArray())
+        buff.fillRect(x, h // 2, 8, 8, BaeVec3d(0, 0, 0))
+        return len(encode)
+    return BaeBenchCase(f'encode.diff.{mode()}.{w}x{h}', run, setup, params={'width': w, 'height': h, 'colorMode': mode()})
+
+def _computeCases(w:int, h:int)->list:
+    kernel = lambda x, y, extra : BaeVec3d(x * 255 / extra['bw'], y * 255 / extra['bh'], 128)
+    cases = [BaeBenchCase(f'compute.{w}x{h}', lambda buff : buff.compute(kernel),
+                          lambda : BaeBuffer(w, h, BaeColorMode.Color24Bits), params={'width': w, 'height': h})]
+    if np is not None:
+        vkernel = lambda x, y, u : np.stack([x * (255 / u.bw), y * (255 / u.bh), np.full_like(x, 128)], axis=-1)
+        cases.append(BaeBenchCase(f'computeVectorized.{w}x{h}', lambda buff : buff.computeVectorized(vkernel),
+                                  lambda : BaeBuffer(w, h, BaeColorMode.Color24Bits, storage=BaeBufferStorage.UInt8),
+                                  params={'width': w, 'height': h}))
+    return cases
+
+def _blitCase(storage:BaeBufferStorage, count:int = 32)->BaeBenchCase:
+    """
+    what BaeTermDrawPipeline.__drawPrimitive does for count sprites: pick the frame, blit it
+    """
+    def setup():
+        sprites = []
+        rnd = random.Random(3)
+        for idx in range(count):
+            sprite = BaeSprite(16, 16, 2, 10, BaeColorMode.Color24Bits, storage=storage)
+            for seq in range(2):
+                for y in range(16):
+                    for x in range(16):
+                        # a disc, corners stay transparent
+                        if (x - 7.5) ** 2 + (y - 7.5) ** 2 < 64:
+                            sprite.rawFillPixel(x, y, BaeVec3d(rnd.randrange(1, 256), 64, 64 * seq), seq)
+            sprite.bake()
+            sprite.setPos(rnd.randrange(-8, 160), rnd.randrange(-8, 96))
+            sprites.append(sprite)
+        return {'target': BaeBuffer(160, 96, BaeColorMode.Color24Bits, storage=storage), 'sprites': sprites}
+    def run(state):
+        target = state['target']
+        for sprite in state['sprites']:
+            pos = sprite.Pos
+            target.blit(sprite.playAtRate(1 / 30), round(pos.X), round(pos.Y))
+    return BaeBenchCase(f'blit.sprite.{storage()}.x{count}', run, setup, params={'count': count, 'storage': storage()})
+
+def _rasterCases(storage:BaeBufferStorage, count:int = 50)->list:
+    rnd = random.Random(5)
+    pts = [(rnd.randrange(-20, 180), rnd.randrange(-20, 116)) for _ in range(count * 3)]
+    color = BaeVec3d(200, 100, 50)
+    shapes = {
+        'rect': lambda buff : [BaeRaster.rect(buff, x, y, 24, 12, color) for x, y in pts[:count]],
+        'circle': lambda buff : [BaeRaster.circle(buff, x, y, 10, color) for x, y in pts[:count]],
+        'line': lambda buff : [BaeRaster.line(buff, x0, y0, x1, y1, color) for (x0, y0), (x1, y1) in zip(pts[:count], pts[count:count * 2])],
+        'thickLine': lambda buff : [BaeRaster.thickLine(buff, x0, y0, x1, y1, 4, color) for (x0, y0), (x1, y1) in zip(pts[:count], pts[count:count * 2])],
+        'triangle': lambda buff : [BaeRaster.triangle(buff, a, b, c, color) for a, b, c in zip(pts[:count], pts[count:count * 2], pts[count * 2:])],
+    }
+    return [BaeBenchCase(f'raster.{name}.{storage()}.x{count}', shape,
+                         lambda : BaeBuffer(160, 96, BaeColorMode.Color24Bits, storage=storage),
+                         params={'count': count, 'storage': storage()}) for name, shape in shapes.items()]
+
+def _ringReader(ring:BaeFrameRing)->None:
+    while True:
+        ring.acquireFrame()
+        ring.releaseFrame()
+
+def _ipcCase(size:int, frames:int = 64, bMailbox:bool = False)->BaeBenchCase:
+    """
+    frames of size bytes through a BaeFrameRing to a reader process, until it released them all
+    bMailbox: through a BaeFrameMailbox, the writer never waits and the reader skips to the latest
+    """
+    def setup():
+        ring = BaeFrameMailbox(3, size) if bMailbox else BaeFrameRing(3, size)
+        reader = multiprocessing.Process(target=_ringReader, args=(ring,), daemon=True)
+        reader.start()
+        return {'ring': ring, 'reader': reader, 'data': os.urandom(size)}
+    def run(state):
+        ring = state['ring']
+        for _ in range(frames):
+            ring.put(state['data'])
+        while ring.consumed < ring.published:
+            pass
+        return size * frames
+    def teardown(state):
+        state['reader'].kill()
+        state['reader'].join()
+        state['ring'].close()
+    kind = 'mailbox' if bMailbox else 'ring'
+    return BaeBenchCase(f'ipc.{kind}.{size // 1024}k.x{frames}', run, setup, teardown, params={'size': size, 'frames': frames})
+
+def _drainPipe(fd:int)->None:
+    while len(os.read(fd, 1 << 16)) > 0:
+        pass
+
+def _writeCase(sink:str, size:int, frames:int = 16, how:str = 'bytes')->BaeBenchCase:
+    """
+    write frames of size bytes, stdout goes to /dev/null or a pipe drained by a thread
+    how: 'bytes' BaeshadeUtil.outputBytes alone
+         'frame' outputBytes then the cursor move as text, what the worker did before BaeOutputWriter
+         'writer' frame and cursor move in one BaeOutputWriter call, what the worker does
+    """
+    def setup():
+        state = {'stdout': sys.stdout, 'data': os.urandom(size)}
+        if sink == 'pipe':
+            readFd, writeFd = os.pipe()
+            state['drain'] = threading.Thread(target=_drainPipe, args=(readFd,), daemon=True)
+            state['drain'].start()
+            state['fds'] = (readFd,)
+            out = os.fdopen(writeFd, 'wb')
+        else:
+            state['fds'] = ()
+            out = open(os.devnull, 'wb')
+        sys.stdout = io.TextIOWrapper(out, encoding='utf-8')
+        state['writer'] = BaeOutputWriter(sys.stdout.fileno())
+        return state
+    def run(state):
+        writer = state['writer']
+        data = state['data']
+        for _ in range(frames):
+            match how:
+                case 'writer':
+                    writer.write(data, b'\x1b[2;1H')
+                case 'frame':
+                    BaeshadeUtil.outputBytes(data)
+                    BaeshadeUtil.resetCursorPos(2, 1)
+                case _:
+                    BaeshadeUtil.outputBytes(data)
+        return size * frames
+    def teardown(state):
+        out = sys.stdout
+        sys.stdout = state['stdout']
+        out.close()
+        if sink == 'pipe':
+            state['drain'].join()
+            os.close(state['fds'][0])
+    name = f'write.{sink}' if how == 'bytes' else f'write.{sink}.{how}'
+    return BaeBenchCase(f'{name}.{size // 1024}k.x{frames}', run, setup, teardown, params={'size': size, 'frames': frames})
+
+def defaultBench(bQuick:bool = False)->BaeBench:
+    """
+    the standard suite, bQuick only keeps the small sizes and runs shorter
+    """
+    bench = BaeBench(minTime=0.05 if bQuick else 0.3)
+    sizes = [(80, 48)] if bQuick else [(80, 48), (160, 96)]
+    storages = [BaeBufferStorage.PyList] + ([BaeBufferStorage.UInt8] if np is not None else [])
+
+    for w, h in sizes:
+        for mode in (BaeColorMode.Color8Bits, BaeColorMode.Color24Bits):
+            for storage in storages:
+                bench.add(_encodeCase(w, h, mode, storage))
+            if np is not None:
+                bench.add(_diffCase(w, h, mode))
+        for case in _computeCases(w, h):
+            bench.add(case)
+    for storage in storages:
+        bench.add(_blitCase(storage))
+        for case in _rasterCases(storage):
+            bench.add(case)
+    # a 160 x 96 true-color frame is about 200KB
+    for size in (16 * 1024, 256 * 1024):
+        bench.add(_ipcCase(size))
+        bench.add(_ipcCase(size, bMailbox=True))
+        for how in ('bytes', 'frame', 'writer'):
+            bench.add(_writeCase('devnull', size, how=how))
+            bench.add(_writeCase('pipe', size, how=how))
+    return bench
+
+def main(argv:Optional[list] = None)->int:
+    parser = argparse.ArgumentParser(prog='python -m baeshade.baeshadebench', description='headless baeshade benchmarks')
+    parser.add_argument('--quick', action='store_true', help='small sizes and short runs')
+    parser.add_argument('--filter', default=None, help='only cases whose name contains this text')
+    parser.add_argument('--list', action='store_true', help='list case names and exit')
+    parser.add_argument('--out', default=None, help='write the JSON report there')
+    parser.add_argument('--baseline', default=None, help='JSON report to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative change of the median counted as slower or faster')
+    args = parser.parse_args(argv)
+
+    bench = defaultBench(args.quick)
+    if args.list:
+        print('\n'.join(bench.names))
+        return 0
+
+    report = bench.run(args.filter, sys.stderr)
+    report['meta']['quick'] = args.quick
+    if args.out is not None:
+        with open(args.out, 'w') as fp:
+            json.dump(report, fp, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline is not None:
+        with open(args.baseline) as fp:
+            rows = BaeBench.compare(report, json.load(fp), args.threshold)
+        print(BaeBench.formatCompare(rows), file=sys.stderr)
+        if any(verdict == 'slower' for *_, verdict in rows):
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,341 @@
+import os
+import pickle
+import struct
+import multiprocessing
+from multiprocessing import shared_memory
+
+"""
+inter-process transports between the draw pipeline and the encoding worker
+"""
+
+# shared memory attached inside pool processes, one block per key: key -> SharedMemory
+_attached = {}
+
+def attachSharedMemory(key:str, name:str)->shared_memory.SharedMemory:
+    """
+    attach a block by name from a pool process, keep it open for next tasks
+    a new name for the same key closes the previous block
+    """
+    shm = _attached.get(key)
+    if shm is not None and shm.name.lstrip('/') == name.lstrip('/'):
+        return shm
+    if shm is not None:
+        shm.close()
+    shm = shared_memory.SharedMemory(name=name)
+    _attached[key] = shm
+    return shm
+
+class BaeSharedDict:
+    """
+    small dict in shared memory, written by one process and read by the others
+    values are pickled together, a version count lets readers skip unchanged content
+    """
+
+    # version, pickled length
+    _Header = struct.Struct('QQ')
+
+    def __init__(self, values:dict, size:int = 4096):
+        """
+        size: max bytes of the pickled dict
+        """
+        self._size = size
+        self._shm = shared_memory.SharedMemory(create=True, size=BaeSharedDict._Header.size + size)
+        self._ownerPid = os.getpid()
+        self._lock = multiprocessing.Lock()
+        self._version = 0
+        self._values = dict(values)
+        try:
+            self.__store()
+        except ValueError:
+            self.close()
+            raise
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_shm'] = self._shm.name
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = shared_memory.SharedMemory(name=state['_shm'])
+
+    def __store(self)->None:
+        data = pickle.dumps(self._values)
+        if len(data) > self._size:
+            raise ValueError(f'shared dict of {len(data)} bytes exceed size {self._size}')
+        with self._lock:
+            version = BaeSharedDict._Header.unpack_from(self._shm.buf, 0)[0] + 1
+            self._shm.buf[BaeSharedDict._Header.size:BaeSharedDict._Header.size + len(data)] = data
+            BaeSharedDict._Header.pack_into(self._shm.buf, 0, version, len(data))
+        self._version = version
+
+    def __refresh(self)->None:
+        if BaeSharedDict._Header.unpack_from(self._shm.buf, 0)[0] == self._version:
+            return
+        with self._lock:
+            self._version, length = BaeSharedDict._Header.unpack_from(self._shm.buf, 0)
+            self._values = pickle.loads(self._shm.buf[BaeSharedDict._Header.size:BaeSharedDict._Header.size + length])
+
+    def __getitem__(self, key):
+        self.__refresh()
+        return self._values[key]
+
+    def __setitem__(self, key, value)->None:
+        self.__refresh()
+        self._values[key] = value
+        self.__store()
+
+    def get(self, key, default = None):
+        self.__refresh()
+        return self._values.get(key, default)
+
+    def update(self, values:dict)->None:
+        self.__refresh()
+        self._values.update(values)
+        self.__store()
+
+    def close(self)->None:
+        """
+        detach from the shared memory, the creating process also frees it
+        """
+        if self._shm is None:
+            return
+        self._shm.close()
+        if os.getpid() == self._ownerPid:
+            self._shm.unlink()
+        self._shm = None
+
+class BaeFrameRing:
+    """
+    fixed ring of frame slots in shared memory, for one writer and one reader process
+    the ring starts with a count of frames released by the reader
+    every slot is a header (sequence number, payload length) followed by the payload
+    """
+
+    _Consumed = struct.Struct('Q')
+    # control block at the start of the shared memory, it begins with the consumed count
+    _Control = _Consumed
+    _Header = struct.Struct('QQ')
+
+    def __init__(self, slotCount:int, slotSize:int):
+        """
+        slotCount: how many frames can be in flight
+        slotSize: max payload bytes of one frame
+        """
+        self._slotCount = slotCount
+        self._slotSize = slotSize
+        self._stride = BaeFrameRing._Header.size + slotSize
+        self._shm = shared_memory.SharedMemory(create=True, size=self._Control.size + self._stride * slotCount)
+        BaeFrameRing._Consumed.pack_into(self._shm.buf, 0, 0)
+        self._ownerPid = os.getpid()
+
+        # free: slots the writer may fill, filled: slots waiting for the reader
+        self._free = multiprocessing.Semaphore(slotCount)
+        self._filled = multiprocessing.Semaphore(0)
+
+        # each side only touches its own counter
+        self._writeSeq = 0
+        self._readSeq = 0
+        self._view = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_shm'] = self._shm.name
+        state['_view'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = shared_memory.SharedMemory(name=state['_shm'])
+
+    @property
+    def slotCount(self)->int:
+        return self._slotCount
+
+    @property
+    def slotSize(self)->int:
+        return self._slotSize
+
+    @property
+    def consumed(self)->int:
+        """
+        how many frames the reader has released, frame seq is done once consumed > seq
+        """
+        return BaeFrameRing._Consumed.unpack_from(self._shm.buf, 0)[0]
+
+    @property
+    def published(self)->int:
+        """
+        how many frames this writer has published, the last one has seq published - 1
+        """
+        return self._writeSeq
+
+    def _slot(self, idx:int)->int:
+        return self._Control.size + (idx % self._slotCount) * self._stride
+
+    def beginWrite(self, block:bool = True):
+        """
+        reserve the next slot, return a writable memoryview of its payload
+        or None if block is false and the reader is behind
+        """
+        if not self._free.acquire(block):
+            return None
+        offset = self._slot(self._writeSeq) + BaeFrameRing._Header.size
+        return self._shm.buf[offset:offset + self._slotSize]
+
+    def endWrite(self, length:int)->int:
+        """
+        publish the reserved slot with length bytes of payload, return its sequence number
+        """
+        seq = self._writeSeq
+        BaeFrameRing._Header.pack_into(self._shm.buf, self._slot(seq), seq, length)
+        self._writeSeq += 1
+        self._filled.release()
+        return seq
+
+    def put(self, data, block:bool = True)->bool:
+        """
+        copy a frame into the ring, return false if it is dropped
+        """
+        if len(data) > self._slotSize:
+            raise ValueError(f'frame of {len(data)} bytes exceed slot size {self._slotSize}')
+
+        view = self.beginWrite(block)
+        if view is None:
+            return False
+        view[:len(data)] = data
+        view.release()
+        self.endWrite(len(data))
+        return True
+
+    def acquireFrame(self, timeout:float = None):
+        """
+        wait the next frame, return (seq, memoryview of payload) or None on timeout
+        the view is valid until releaseFrame
+        """
+        if not self._filled.acquire(True, timeout):
+            return None
+        offset = self._slot(self._readSeq)
+        seq, length = BaeFrameRing._Header.unpack_from(self._shm.buf, offset)
+        offset += BaeFrameRing._Header.size
+        self._view = self._shm.buf[offset:offset + length]
+        return seq, self._view
+
+    def releaseFrame(self):
+        """
+        give the slot back to the writer
+        """
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        self._readSeq += 1
+        BaeFrameRing._Consumed.pack_into(self._shm.buf, 0, self._readSeq)
+        self._free.release()
+
+    def close(self):
+        """
+        detach from the shared memory, the creating process also frees it
+        """
+        if self._shm is None:
+            return
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        self._shm.close()
+        if os.getpid() == self._ownerPid:
+            self._shm.unlink()
+        self._shm = None
+
+class BaeFrameMailbox(BaeFrameRing):
+    """
+    latest frame wins, for one writer and one reader process
+    the writer never waits: a frame published before the reader took the previous one replaces it,
+    the replaced frame is counted as superseded. The reader always gets the most recent frame
+    three slots at least: one being read, one waiting, one being written
+    consumed keeps the ring meaning, frame seq is done (read or superseded) once consumed > seq
+    """
+
+    # consumed, superseded, waiting seq, waiting slot, slot being read, -1 for none
+    _Control = struct.Struct('QQqqq')
+
+    def __init__(self, slotCount:int, slotSize:int):
+        super().__init__(max(3, slotCount), slotSize)
+        BaeFrameMailbox._Control.pack_into(self._shm.buf, 0, 0, 0, -1, -1, -1)
+        # guards the control block, ready is released when a frame starts waiting
+        self._lock = multiprocessing.Lock()
+        self._ready = self._filled
+        self._writeSlot = None
+        self._replaced = -1
+
+    @property
+    def superseded(self)->int:
+        """
+        how many frames were replaced before the reader took them
+        """
+        return BaeFrameMailbox._Control.unpack_from(self._shm.buf, 0)[1]
+
+    @property
+    def replaced(self)->int:
+        """
+        seq of the frame the last endWrite replaced, -1 if none was waiting
+        the reader will never see it, what it points to can be reused at once. Writer side only
+        """
+        return self._replaced
+
+    def beginWrite(self, block:bool = True):
+        """
+        reserve a slot neither read nor waiting, return a writable memoryview of its payload
+        never waits, block is there for the ring interface
+        """
+        with self._lock:
+            _, _, _, waiting, reading = BaeFrameMailbox._Control.unpack_from(self._shm.buf, 0)
+            self._writeSlot = next(idx for idx in range(self._slotCount) if idx != waiting and idx != reading)
+        offset = self._slot(self._writeSlot) + BaeFrameRing._Header.size
+        return self._shm.buf[offset:offset + self._slotSize]
+
+    def endWrite(self, length:int)->int:
+        """
+        publish the reserved slot, replacing the frame still waiting if any
+        """
+        seq = self._writeSeq
+        BaeFrameRing._Header.pack_into(self._shm.buf, self._slot(self._writeSlot), seq, length)
+        with self._lock:
+            consumed, superseded, waitingSeq, _, reading = BaeFrameMailbox._Control.unpack_from(self._shm.buf, 0)
+            if waitingSeq < 0:
+                self._ready.release()
+            else:
+                superseded += 1
+            self._replaced = waitingSeq
+            BaeFrameMailbox._Control.pack_into(self._shm.buf, 0, consumed, superseded, seq, self._writeSlot, reading)
+        self._writeSlot = None
+        self._writeSeq += 1
+        return seq
+
+    def acquireFrame(self, timeout:float = None):
+        """
+        wait a frame, return (seq, memoryview of payload) of the most recent one or None on timeout
+        frames before it are superseded, the view is valid until releaseFrame
+        """
+        if not self._ready.acquire(True, timeout):
+            return None
+        with self._lock:
+            _, superseded, seq, slot, _ = BaeFrameMailbox._Control.unpack_from(self._shm.buf, 0)
+            # frames before seq are either read already or superseded
+            BaeFrameMailbox._Control.pack_into(self._shm.buf, 0, seq, superseded, -1, -1, slot)
+        offset = self._slot(slot)
+        seq, length = BaeFrameRing._Header.unpack_from(self._shm.buf, offset)
+        offset += BaeFrameRing._Header.size
+        self._readSeq = seq
+        self._view = self._shm.buf[offset:offset + length]
+        return seq, self._view
+
+    def releaseFrame(self):
+        """
+        give the slot back to the writer
+        """
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        with self._lock:
+            _, superseded, waitingSeq, waiting, _ = BaeFrameMailbox._Control.unpack_from(self._shm.buf, 0)
+            BaeFrameMailbox._Control.pack_into(self._shm.buf, 0, self._readSeq + 1, superseded, waitingSeq, waiting, -1)
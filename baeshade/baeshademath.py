@@ -1,41 +1,76 @@
 import math
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 """
 simple math utilities, performance is not guaranteed.
+BaeVec2Array / BaeVec3Array run the same math over whole arrays, they require numpy
 """
 
+def _isBatch(o)->bool:
+    """
+    operand that turns a scalar vector operation into a batch one
+    """
+    return isinstance(o, BaeVec2Array) or (np is not None and isinstance(o, np.ndarray))
+
 class BaeVec2d:
     __slots__ = ['X', 'Y', '_eps']
+    # numpy arrays on the left hand side defer to our reflected operators
+    __array_ufunc__ = None
+
     def __init__(self, x=0,y=0,eps=0.000001):
         self.X = x
         self.Y = y
         self._eps = eps
 
     def __add__(self, o):
-        return BaeVec2d(self.X + o.X, self.Y + o.Y)
+        if _isBatch(o):
+            return BaeVec2Array(self.X, self.Y) + o
+        if isinstance(o, BaeVec2d):
+            return BaeVec2d(self.X + o.X, self.Y + o.Y)
+        else:
+            return BaeVec2d(self.X + o, self.Y + o)
+
+    def __radd__(self, o):
+        return self.__add__(o)
     
     def __iadd__(self, o):
-        if isinstance(o, float):
-            return BaeVec2d(self.X + o, self.Y + o)
-        else:
-            return BaeVec2d(self.X + o.X, self.Y + o.Y)
+        """
+        a new vector like +, cells and palette colors share instances so this never mutates
+        """
+        return self + o
 
     def __sub__(self,o):
+        if _isBatch(o):
+            return BaeVec2Array(self.X, self.Y) - o
         if isinstance(o, BaeVec2d):
             return BaeVec2d(self.X - o.X, self.Y - o.Y)
         else:
             return BaeVec2d(self.X - o, self.Y - o)
 
-    def __isub__(self,o):
-        if isinstance(o, float):
-            return BaeVec2d(self.X - o, self.Y - o)
-        else:
-            return BaeVec2d(self.X - o.X, self.Y - o.Y)
+    def __rsub__(self, o):
+        return (-1.0 * self).__add__(o)
+
+    def __isub__(self, o):
+        return self - o
 
     def __mul__(self, f):
+        if _isBatch(f):
+            return BaeVec2Array(self.X, self.Y) * f
         return BaeVec2d(self.X * f, self.Y * f)
+
+    def __rmul__(self, f):
+        return self.__mul__(f)
+
+    def __imul__(self, f):
+        return self * f
     
     def __truediv__(self, f):
+        if _isBatch(f):
+            return BaeVec2Array(self.X, self.Y) / f
         if isinstance(f, float):
             return BaeVec2d(self.X / f, self.Y /f)
         elif isinstance(f, int):
@@ -43,6 +78,9 @@ class BaeVec2d:
         else:
             return BaeVec2d(self.X / f.X, self.Y /f.Y)
 
+    def __itruediv__(self, f):
+        return self / f
+
     def __eq__(self, o):
         return abs(self.X - o.X) < self._esp and abs(self.Y - o.Y) < self._esp
     
@@ -75,30 +113,36 @@ class BaeVec3d(BaeVec2d):
         return self
 
     def __add__(self,o):
+        if _isBatch(o):
+            return BaeVec3Array(self.X, self.Y, self.Z) + o
         if isinstance(o, BaeVec3d):
             return BaeVec3d(self.X + o.X, self.Y + o.Y, self.Z + o.Z)
         else:
             return BaeVec3d(self.X + o, self.Y + o, self.Z + o)
 
-    def __iadd__(self,o):
-        if isinstance(o, float):
-            return BaeVec3d(self.X + o, self.Y + o, self.Z + o)
-        else:
-            return BaeVec3d(self.X + o.X, self.Y + o.Y, self.Z + o.Z)
+    def __radd__(self, o):
+        return self.__add__(o)
+
+    def __iadd__(self, o):
+        return self + o
 
     def __sub__(self,o):
+        if _isBatch(o):
+            return BaeVec3Array(self.X, self.Y, self.Z) - o
         if isinstance(o, BaeVec3d):
             return BaeVec3d(self.X - o.X, self.Y - o.Y, self.Z - o.Z)
         else:
             return BaeVec3d(self.X - o, self.Y - o, self.Z - o)
+
+    def __rsub__(self, o):
+        return (-1.0 * self).__add__(o)
     
-    def __isub__(self,o):
-        if isinstance(o, float):
-            return BaeVec3d(self.X - o, self.Y - o, self.Z - o)
-        else:
-            return BaeVec3d(self.X - o.X, self.Y - o.Y, self.Z - o.Z)
+    def __isub__(self, o):
+        return self - o
 
     def __mul__(self, f):
+        if _isBatch(f):
+            return BaeVec3Array(self.X, self.Y, self.Z) * f
         if isinstance(f, BaeVec3d):
             return BaeVec3d(self.X * f.X, self.Y * f.Y, self.Z * f.Z )
         else:
@@ -106,8 +150,13 @@ class BaeVec3d(BaeVec2d):
         
     def __rmul__(self, f):
         return self.__mul__(f)
+
+    def __imul__(self, f):
+        return self * f
     
     def __truediv__(self, f):
+        if _isBatch(f):
+            return BaeVec3Array(self.X, self.Y, self.Z) / f
         if isinstance(f, float):
             return BaeVec3d(self.X / f, self.Y /f, self.Z / f)
         elif isinstance(f, int):
@@ -115,6 +164,9 @@ class BaeVec3d(BaeVec2d):
         else:
             return BaeVec3d(self.X / f.X, self.Y /f.Y, self.Z / f.Z)
 
+    def __itruediv__(self, f):
+        return self / f
+
     def __eq__(self, o):
         return abs(self.X - o.X) < self._eps and \
                 abs(self.Y - o.Y) < self._eps and \
@@ -140,6 +192,142 @@ class BaeRay:
         p = self._o + self._dir * t
         return BaeVec3d(p.X,p.Y,p.Z)
     
+class BaeVec2Array:
+    """
+    batch of 2d vectors, one array per component, require numpy
+    the other operand can be a batch, a BaeVec2d, a number or an array applied to every component
+    """
+    __slots__ = ['X', 'Y']
+    _Fields = ('X', 'Y')
+    # numpy arrays on the left hand side defer to our reflected operators
+    __array_ufunc__ = None
+
+    def __init__(self, x=0.0, y=0.0):
+        """
+        components are copied to float64 arrays
+        """
+        if np is None:
+            raise ImportError(f'{type(self).__name__} requires numpy, try: pip install numpy')
+        self.X = np.array(x, dtype=np.float64)
+        self.Y = np.array(y, dtype=np.float64)
+
+    @classmethod
+    def _wrap(cls, parts):
+        """
+        new batch owning parts without copying them
+        """
+        v = cls.__new__(cls)
+        for name, part in zip(cls._Fields, parts):
+            setattr(v, name, part)
+        return v
+
+    @staticmethod
+    def fromArray(arr)->'BaeVec2Array':
+        """
+        view an array of shape (..., 2) or (..., 3) as a batch, writes in place go to arr
+        """
+        cls = BaeVec3Array if arr.shape[-1] == 3 else BaeVec2Array
+        return cls._wrap([arr[..., idx] for idx in range(len(cls._Fields))])
+
+    def asArray(self):
+        """
+        stack components to an array of shape (..., 2) or (..., 3)
+        """
+        return np.stack(np.broadcast_arrays(*self.parts()), axis=-1)
+
+    @property
+    def shape(self):
+        return np.broadcast_shapes(*[np.shape(p) for p in self.parts()])
+
+    def parts(self)->list:
+        return [getattr(self, name) for name in self._Fields]
+
+    def _operand(self, o)->list:
+        if isinstance(o, (BaeVec2Array, BaeVec2d)):
+            return [getattr(o, name) for name in self._Fields]
+        return [o] * len(self._Fields)
+
+    def _apply(self, o, op):
+        return self._wrap([op(a, b) for a, b in zip(self.parts(), self._operand(o))])
+
+    def _applyInPlace(self, o, op):
+        for name, b in zip(self._Fields, self._operand(o)):
+            a = getattr(self, name)
+            if np.shape(a) == np.broadcast_shapes(np.shape(a), np.shape(b)):
+                op(a, b, out=a)
+            else:
+                # operand is larger than this component, it can't hold the result
+                setattr(self, name, op(a, b))
+        return self
+
+    def __add__(self, o):
+        return self._apply(o, np.add)
+
+    def __radd__(self, o):
+        return self._apply(o, np.add)
+
+    def __iadd__(self, o):
+        return self._applyInPlace(o, np.add)
+
+    def __sub__(self, o):
+        return self._apply(o, np.subtract)
+
+    def __rsub__(self, o):
+        return self._apply(o, lambda a, b : b - a)
+
+    def __isub__(self, o):
+        return self._applyInPlace(o, np.subtract)
+
+    def __mul__(self, f):
+        return self._apply(f, np.multiply)
+
+    def __rmul__(self, f):
+        return self._apply(f, np.multiply)
+
+    def __imul__(self, f):
+        return self._applyInPlace(f, np.multiply)
+
+    def __truediv__(self, f):
+        return self._apply(f, np.divide)
+
+    def __rtruediv__(self, f):
+        return self._apply(f, lambda a, b : b / a)
+
+    def __itruediv__(self, f):
+        return self._applyInPlace(f, np.divide)
+
+    def __neg__(self):
+        return self._wrap([-a for a in self.parts()])
+
+    @property
+    def Length(self):
+        return np.sqrt(sum(a * a for a in self.parts()))
+
+    def Normalize(self):
+        """
+        normalize in place like BaeVec3d.Normalize
+        """
+        return self._applyInPlace(self.Length, np.divide)
+
+    @staticmethod
+    def Dot(lh, rh):
+        """
+        per vector dot product, either side may be a single vector
+        """
+        names = BaeVec3Array._Fields if isinstance(lh, (BaeVec3Array, BaeVec3d)) else BaeVec2Array._Fields
+        return sum(getattr(lh, name) * getattr(rh, name) for name in names)
+
+class BaeVec3Array(BaeVec2Array):
+    """
+    batch of 3d vectors, see BaeVec2Array
+    """
+    __slots__ = ['Z']
+    _Fields = ('X', 'Y', 'Z')
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        super().__init__(x, y)
+        self.Z = np.array(z, dtype=np.float64)
+
 class BaeMathUtil:
 
     __p = float(10**5)
@@ -149,6 +337,10 @@ class BaeMathUtil:
         """
         clamp value v at: b <= v <= t
         """
+        if isinstance(v, BaeVec2Array):
+            return v._wrap([np.clip(a, b, t) for a in v.parts()])
+        if _isBatch(v):
+            return np.clip(v, b, t)
         return max(b, min(v,t))
     
     @staticmethod
@@ -160,7 +352,11 @@ class BaeMathUtil:
         return a + (b - a) * t
     
     def cos(v):
-        if isinstance(v, BaeVec3d):
+        if isinstance(v, BaeVec2Array):
+            return v._wrap([np.cos(a) for a in v.parts()])
+        elif _isBatch(v):
+            return np.cos(v)
+        elif isinstance(v, BaeVec3d):
             return BaeVec3d(math.cos(v.X), math.cos(v.Y), math.cos(v.Z))
         elif isinstance(v, BaeVec2d):
             return BaeVec2d(math.cos(v.X), math.cos(v.Y))
@@ -0,0 +1,142 @@
+import os
+import sys
+import time
+import select
+from typing import Optional
+
+"""
+frame output straight to a file descriptor, no text layer in between
+"""
+
+class BaeOutputWriter:
+    """
+    write bytes and memoryviews to a fd with os.writev (os.write where missing)
+    partial writes are resumed, EAGAIN on a non-blocking fd waits until it is writable again
+    a stall is time the terminal held us back: waiting on EAGAIN, a partial write,
+    or a single call slower than stallThreshold
+    """
+
+    # iovecs per writev call, below IOV_MAX of every platform we know
+    _MaxParts = 64
+
+    def __init__(self, fd:Optional[int] = None, chunkSize:int = 1024 * 1024, stallThreshold:float = 0.002):
+        """
+        fd: stdout by default, blocking or not (a parent process may have set O_NONBLOCK on it)
+        chunkSize: max bytes handed to one system call, by default a whole frame goes in one
+        stallThreshold: seconds a single call may take before it counts as a stall
+        """
+        self._fd = sys.stdout.fileno() if fd is None else fd
+        self._chunkSize = chunkSize
+        self._stallThreshold = stallThreshold
+        self._bWritev = hasattr(os, 'writev')
+        self._bytesWritten = 0
+        self._calls = 0
+        self._partialWrites = 0
+        self._stalls = 0
+        self._stallTime = 0.0
+        self._lastStall = 0.0
+
+    @property
+    def fd(self)->int:
+        return self._fd
+
+    @property
+    def bytesWritten(self)->int:
+        return self._bytesWritten
+
+    @property
+    def calls(self)->int:
+        """
+        write system calls made
+        """
+        return self._calls
+
+    @property
+    def partialWrites(self)->int:
+        return self._partialWrites
+
+    @property
+    def stalls(self)->int:
+        return self._stalls
+
+    @property
+    def stallTime(self)->float:
+        """
+        seconds stalled since start
+        """
+        return self._stallTime
+
+    @property
+    def lastStall(self)->float:
+        """
+        seconds stalled by the last write
+        """
+        return self._lastStall
+
+    def __waitWritable(self)->None:
+        start = time.perf_counter()
+        select.select([], [self._fd], [])
+        self._lastStall += time.perf_counter() - start
+
+    def write(self, *parts)->int:
+        """
+        write all parts in order, bytes or other contiguous byte buffers
+        return bytes written
+        """
+        chunkSize = self._chunkSize
+        pending = []
+        for part in parts:
+            size = len(part)
+            if size <= chunkSize:
+                if size > 0:
+                    pending.append(part)
+                continue
+            # views, slicing bytes would copy them
+            view = memoryview(part)
+            pending.extend(view[offset:offset + chunkSize] for offset in range(0, size, chunkSize))
+
+        total = 0
+        for part in pending:
+            total += len(part)
+        self._lastStall = 0.0
+        stallCount = 0
+        idx = 0
+        while idx < len(pending):
+            batch = pending[idx:idx + BaeOutputWriter._MaxParts]
+            size = len(batch[0])
+            for count in range(1, len(batch)):
+                if size + len(batch[count]) > chunkSize:
+                    del batch[count:]
+                    break
+                size += len(batch[count])
+
+            start = time.perf_counter()
+            try:
+                done = os.writev(self._fd, batch) if self._bWritev and len(batch) > 1 else os.write(self._fd, batch[0])
+            except BlockingIOError:
+                stallCount += 1
+                self.__waitWritable()
+                continue
+            elapsed = time.perf_counter() - start
+            self._calls += 1
+            self._bytesWritten += done
+
+            bPartial = done < size
+            if bPartial:
+                self._partialWrites += 1
+            if bPartial or elapsed > self._stallThreshold:
+                stallCount += 1
+                self._lastStall += elapsed
+
+            # drop what went out, keep the rest of a part cut in the middle
+            while done > 0:
+                if done >= len(pending[idx]):
+                    done -= len(pending[idx])
+                    idx += 1
+                else:
+                    pending[idx] = memoryview(pending[idx])[done:]
+                    done = 0
+
+        self._stalls += stallCount
+        self._stallTime += self._lastStall
+        return total
@@ -0,0 +1,233 @@
+import csv
+import json
+import math
+from collections import deque, OrderedDict
+from typing import Optional
+
+"""
+per frame timings of the draw pipeline, tagged with the frame sequence number
+"""
+
+class BaePerfWindow:
+    """
+    rolling window over the latest samples of one stage
+    """
+
+    def __init__(self, size:int = 600):
+        self._samples = deque(maxlen=size)
+        self._count = 0
+
+    def add(self, value:float)->None:
+        self._samples.append(value)
+        self._count += 1
+
+    @property
+    def count(self)->int:
+        """
+        samples seen since start, the window only keeps the latest ones
+        """
+        return self._count
+
+    @property
+    def last(self)->float:
+        return self._samples[-1] if len(self._samples) > 0 else 0.0
+
+    @staticmethod
+    def __rank(ordered:list, p:float)->float:
+        # nearest rank, p in [0, 100]
+        idx = max(0, math.ceil(p / 100.0 * len(ordered)) - 1)
+        return ordered[min(idx, len(ordered) - 1)]
+
+    def percentile(self, p:float)->float:
+        if len(self._samples) == 0:
+            return 0.0
+        return BaePerfWindow.__rank(sorted(self._samples), p)
+
+    def summary(self)->dict:
+        """
+        {'count','last','mean','max','p50','p95','p99'} over the window
+        """
+        if len(self._samples) == 0:
+            return {'count': self._count, 'last': 0.0, 'mean': 0.0, 'max': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+        ordered = sorted(self._samples)
+        return {
+            'count': self._count,
+            'last': self._samples[-1],
+            'mean': sum(ordered) / len(ordered),
+            'max': ordered[-1],
+            'p50': BaePerfWindow.__rank(ordered, 50),
+            'p95': BaePerfWindow.__rank(ordered, 95),
+            'p99': BaePerfWindow.__rank(ordered, 99),
+        }
+
+class BaePerfRecorder:
+    """
+    collect stage timings in ms for every frame
+    stages: 'frame', 'logic' from BaeApp, 'task.<class name>', 'displayList', 'encode', 'submit', 'present'
+            from the pipeline, and from the worker 'ipc' (submitted to picked up), 'encode', 'write',
+            'stall' (part of write the terminal held the worker back), 'latency' (submitted to written)
+    'bytes' is the size written to the terminal
+    a frame is complete once the worker reported it, right away when it was dropped,
+    or once a newer frame was reported when it was superseded
+    """
+
+    # frames waiting for the worker, older ones are completed without its report
+    _MaxPending = 256
+
+    def __init__(self, window:int = 600, history:int = 600):
+        """
+        window: samples per stage kept for percentiles
+        history: completed frames kept for dumpFrames
+        """
+        self._window = window
+        self._stages = {}
+        self._frames = deque(maxlen=history)
+        self._pending = OrderedDict()
+        self._open = None
+        self._seq = 0
+
+    @property
+    def seq(self)->int:
+        """
+        sequence number of the frame being recorded
+        """
+        return self._seq
+
+    def stage(self, name:str)->BaePerfWindow:
+        window = self._stages.get(name)
+        if window is None:
+            window = self._stages[name] = BaePerfWindow(self._window)
+        return window
+
+    def percentile(self, name:str, p:float)->float:
+        """
+        p-th percentile of a stage, 0 if it has no sample yet
+        """
+        window = self._stages.get(name)
+        return window.percentile(p) if window is not None else 0.0
+
+    def record(self, name:str, value:float)->None:
+        """
+        add to a stage of the current frame, repeated records in one frame add up
+        """
+        if self._open is None:
+            self._open = {'seq': self._seq}
+        self._open[name] = self._open[name] + value if name in self._open else value
+
+    def endFrame(self, ringSeq:Optional[int] = None, published:Optional[float] = None, bWritten:bool = False)->int:
+        """
+        close the current frame, return its sequence number
+        ringSeq: frame ring sequence it was published as, it then waits for the worker report
+        published: perf_counter when it was submitted for publishing
+        bWritten: without ringSeq, the frame was written already (headless) rather than dropped
+        """
+        frame = self._open if self._open is not None else {'seq': self._seq}
+        self._open = None
+        self._seq += 1
+        if ringSeq is None:
+            if not bWritten:
+                frame['dropped'] = True
+            self.__complete(frame)
+        else:
+            frame['_published'] = published
+            self._pending[ringSeq] = frame
+            while len(self._pending) > BaePerfRecorder._MaxPending:
+                self.__complete(self._pending.popitem(last=False)[1])
+        return frame['seq']
+
+    def completeFrame(self, ringSeq:int, acquired:float, encodeSec:Optional[float], writeSec:float, size:int, stallSec:float = 0.0,
+                      written:Optional[float] = None)->None:
+        """
+        worker report of a published frame
+        acquired: perf_counter when the worker picked it up
+        encodeSec: None when the pipeline encoded the frame itself
+        stallSec: see BaeOutputWriter
+        written: perf_counter when the write was done
+        """
+        frame = self._pending.pop(ringSeq, None)
+        if frame is None:
+            return
+        published = frame.pop('_published', None)
+        if published is not None:
+            # perf_counter is a system wide monotonic clock, so it compares across processes
+            frame['ipc'] = max(0.0, acquired - published) * 1000
+            if written is not None:
+                frame['latency'] = max(0.0, written - published) * 1000
+        if encodeSec is not None:
+            frame['encode'] = frame.get('encode', 0.0) + encodeSec * 1000
+        frame['write'] = writeSec * 1000
+        frame['stall'] = stallSec * 1000
+        frame['bytes'] = size
+        self.__complete(frame)
+
+    def supersede(self, ringSeq:int)->None:
+        """
+        frames published before ringSeq still waiting for the worker were replaced by a newer one
+        """
+        while len(self._pending) > 0:
+            first = next(iter(self._pending))
+            if first >= ringSeq:
+                break
+            frame = self._pending.pop(first)
+            frame['superseded'] = True
+            self.__complete(frame)
+
+    def __complete(self, frame:dict)->None:
+        frame.pop('_published', None)
+        for name, value in frame.items():
+            if name != 'seq' and name != 'dropped' and name != 'superseded':
+                self.stage(name).add(value)
+        self._frames.append(frame)
+
+    def flush(self)->None:
+        """
+        complete frames still waiting for the worker, e.g. on exit
+        """
+        while len(self._pending) > 0:
+            self.__complete(self._pending.popitem(last=False)[1])
+
+    @property
+    def frames(self)->list:
+        """
+        completed frames, oldest first, as {'seq', stage: value, ...}
+        """
+        return list(self._frames)
+
+    @property
+    def lastFrame(self)->Optional[dict]:
+        return self._frames[-1] if len(self._frames) > 0 else None
+
+    def summary(self)->dict:
+        """
+        stage -> BaePerfWindow.summary()
+        """
+        return {name: window.summary() for name, window in self._stages.items()}
+
+    def dumpFrames(self, fp, fmt:str = 'jsonl')->None:
+        """
+        write completed frames to a text file, fmt is 'jsonl' or 'csv'
+        """
+        frames = self.frames
+        if fmt == 'jsonl':
+            for frame in frames:
+                fp.write(json.dumps(frame) + '\n')
+            return
+        assert fmt == 'csv', f'unknown format {fmt}'
+        columns = sorted({name for frame in frames for name in frame} - {'seq'})
+        writer = csv.DictWriter(fp, ['seq'] + columns, restval='')
+        writer.writeheader()
+        writer.writerows(frames)
+
+    def dumpSummary(self, fp, fmt:str = 'jsonl')->None:
+        """
+        write one row per stage with its percentiles, fmt is 'jsonl' or 'csv'
+        """
+        rows = [dict(stage=name, **summary) for name, summary in sorted(self.summary().items())]
+        if fmt == 'jsonl':
+            for row in rows:
+                fp.write(json.dumps(row) + '\n')
+            return
+        assert fmt == 'csv', f'unknown format {fmt}'
+        writer = csv.DictWriter(fp, ['stage', 'count', 'last', 'mean', 'max', 'p50', 'p95', 'p99'])
+        writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,230 @@
+import math
+
+"""
+span based rasterizers, a primitive only visits rows and columns inside its clipped bounds
+buffers are written through fillSpan / fillRect, so any BaeBuffer storage works
+"""
+
+class BaeRaster:
+
+    @staticmethod
+    def __bounds(buff):
+        return buff.virtualSize.X, buff.virtualSize.Y
+
+    @staticmethod
+    def rect(buff, x:int, y:int, w:int, h:int, color, bFill:bool = True)->None:
+        """
+        axis aligned rect at (x, y), only its border when bFill is false
+        """
+        if w <= 0 or h <= 0:
+            return
+        if bFill or w <= 2 or h <= 2:
+            buff.fillRect(x, y, w, h, color)
+            return
+        buff.fillSpan(y, x, x + w, color)
+        buff.fillSpan(y + h - 1, x, x + w, color)
+        buff.fillRect(x, y + 1, 1, h - 2, color)
+        buff.fillRect(x + w - 1, y + 1, 1, h - 2, color)
+
+    @staticmethod
+    def circle(buff, cx:int, cy:int, r:float, color)->None:
+        """
+        solid circle, pixel (x, y) is inside when (x-cx)^2 + (y-cy)^2 <= r^2
+        """
+        if r < 0:
+            return
+        bw, bh = BaeRaster.__bounds(buff)
+        rr = r * r
+        reach = int(r)
+        if cx + reach < 0 or cx - reach >= bw:
+            return
+        for y in range(max(0, cy - reach), min(bh, cy + reach + 1)):
+            rem = rr - (y - cy) * (y - cy)
+            half = int(math.sqrt(rem))
+            # sqrt may round either way, settle on the exact integer bound
+            while (half + 1) * (half + 1) <= rem:
+                half += 1
+            while half * half > rem:
+                half -= 1
+            buff.fillSpan(y, cx - half, cx + half + 1, color)
+
+    @staticmethod
+    def __clipRange(p0:int, step:int, limit:int):
+        """
+        indices n of p0 + step * n inside [0, limit), step is 1 or -1
+        """
+        if step > 0:
+            return -p0, limit - 1 - p0
+        return p0 - limit + 1, p0
+
+    @staticmethod
+    def line(buff, x0:int, y0:int, x1:int, y1:int, color)->None:
+        """
+        Bresenham line, both ends included
+        the segment is clipped to the buffer first, same pixels as linePoints
+        """
+        bw, bh = BaeRaster.__bounds(buff)
+        if max(x0, x1) < 0 or min(x0, x1) >= bw or max(y0, y1) < 0 or min(y0, y1) >= bh:
+            return
+        if y0 == y1:
+            buff.fillSpan(y0, min(x0, x1), max(x0, x1) + 1, color)
+            return
+        if x0 == x1:
+            buff.fillRect(x0, min(y0, y1), 1, abs(y1 - y0) + 1, color)
+            return
+
+        # pixel n is n steps along the major axis and (2 * minor * n + major) // (2 * major) along the other,
+        # so the visible range comes in closed form without walking the line
+        dx, dy = abs(x1 - x0), abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        if dx >= dy:
+            major, minor, p0, q0, sp, sq, pLimit, qLimit = dx, dy, x0, y0, sx, sy, bw, bh
+        else:
+            major, minor, p0, q0, sp, sq, pLimit, qLimit = dy, dx, y0, x0, sy, sx, bh, bw
+        minorAt = lambda n : (2 * minor * n + major) // (2 * major)
+        # first n whose minor step count reaches k
+        firstAt = lambda k : max(0, -((major - 2 * major * k) // (2 * minor)))
+
+        lo, hi = BaeRaster.__clipRange(p0, sp, pLimit)
+        kLo, kHi = BaeRaster.__clipRange(q0, sq, qLimit)
+        lo, hi = max(lo, 0, firstAt(kLo)), min(hi, major, firstAt(kHi + 1) - 1)
+        if lo > hi:
+            return
+
+        if dx >= dy and not buff.isArray:
+            # one run per row
+            for k in range(minorAt(lo), minorAt(hi) + 1):
+                start, end = max(lo, firstAt(k)), min(hi, firstAt(k + 1) - 1)
+                a, b = x0 + sx * start, x0 + sx * end
+                buff.fillSpan(y0 + sy * k, min(a, b), max(a, b) + 1, color)
+            return
+        # arrays take all pixels in one call, short runs per row cost more
+        majors = [p0 + sp * n for n in range(lo, hi + 1)]
+        minors = [q0 + sq * minorAt(n) for n in range(lo, hi + 1)]
+        if dx >= dy:
+            buff.fillPoints(majors, minors, color)
+        else:
+            buff.fillPoints(minors, majors, color)
+
+    @staticmethod
+    def linePoints(x0:int, y0:int, x1:int, y1:int):
+        """
+        yield the pixels of a Bresenham line from (x0, y0) to (x1, y1)
+        """
+        dx, dy = abs(x1 - x0), -abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        err = dx + dy
+        while True:
+            yield x0, y0
+            if x0 == x1 and y0 == y1:
+                return
+            e2 = err * 2
+            if e2 >= dy:
+                err += dy
+                x0 += sx
+            if e2 <= dx:
+                err += dx
+                y0 += sy
+
+    @staticmethod
+    def ddaLine(buff, x0:int, y0:int, x1:int, y1:int, color)->None:
+        """
+        float DDA line, the end point is excluded
+        steps outside the buffer are skipped, a line inside it steps exactly like before
+        """
+        dx, dy = x1 - x0, y1 - y0
+        steps = max(abs(dx), abs(dy))
+        if steps == 0:
+            return
+        if dy == 0:
+            buff.fillSpan(y0, min(x0, x1 + 1), max(x0 + 1, x1), color)
+            return
+        if dx == 0:
+            buff.fillRect(x0, min(y0, y1 + 1), 1, steps, color)
+            return
+
+        bw, bh = BaeRaster.__bounds(buff)
+        incX, incY = dx / float(steps), dy / float(steps)
+        # int() truncates toward zero, so a point is visible while -1 < coordinate < size
+        # Liang-Barsky on both axes, one step of margin for float rounding
+        first, last = 0.0, float(steps - 1)
+        for p0, inc, size in ((x0, incX, bw), (y0, incY, bh)):
+            if inc == 0:
+                continue
+            a, b = (-1 - p0) / inc, (size - p0) / inc
+            first, last = max(first, min(a, b)), min(last, max(a, b))
+        if first > last:
+            return
+        first = max(0, int(first) - 1)
+        last = min(steps - 1, int(last) + 1)
+
+        xs, ys = [], []
+        ptX, ptY = (x0, y0) if first == 0 else (x0 + first * incX, y0 + first * incY)
+        for _ in range(first, last + 1):
+            x, y = int(ptX), int(ptY)
+            if 0 <= x < bw and 0 <= y < bh:
+                xs.append(x)
+                ys.append(y)
+            ptX += incX
+            ptY += incY
+        buff.fillPoints(xs, ys, color)
+
+    @staticmethod
+    def thickLine(buff, x0:float, y0:float, x1:float, y1:float, width:float, color)->None:
+        """
+        line of given width as a filled quad around the segment between pixel centers
+        """
+        if width <= 1:
+            BaeRaster.line(buff, int(x0), int(y0), int(x1), int(y1), color)
+            return
+        dx, dy = x1 - x0, y1 - y0
+        length = math.hypot(dx, dy)
+        half = width * 0.5
+        if length == 0:
+            nx, ny, tx, ty = half, 0.0, 0.0, half
+        else:
+            nx, ny = -dy / length * half, dx / length * half
+            tx, ty = 0.0, 0.0
+        cx0, cy0, cx1, cy1 = x0 + 0.5, y0 + 0.5, x1 + 0.5, y1 + 0.5
+        BaeRaster.polygon(buff, ((cx0 + nx - tx, cy0 + ny - ty), (cx1 + nx + tx, cy1 + ny + ty),
+                                 (cx1 - nx + tx, cy1 - ny + ty), (cx0 - nx - tx, cy0 - ny - ty)), color)
+
+    @staticmethod
+    def triangle(buff, p0, p1, p2, color)->None:
+        """
+        solid triangle, points are (x, y)
+        """
+        BaeRaster.polygon(buff, (p0, p1, p2), color)
+
+    @staticmethod
+    def polygon(buff, points, color)->None:
+        """
+        solid polygon with even-odd fill, points are (x, y)
+        pixel (x, y) is covered when its center (x+0.5, y+0.5) is inside
+        """
+        if len(points) < 3:
+            return
+        bw, bh = BaeRaster.__bounds(buff)
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        if max(xs) <= 0 or min(xs) >= bw:
+            return
+        rowStart = max(0, math.ceil(min(ys) - 0.5))
+        rowEnd = min(bh, math.ceil(max(ys) - 0.5))
+
+        edges = []
+        for idx in range(len(points)):
+            (ax, ay), (bx, by) = points[idx - 1], points[idx]
+            if ay == by:
+                continue
+            if ay > by:
+                ax, ay, bx, by = bx, by, ax, ay
+            edges.append((ay, by, ax, (bx - ax) / (by - ay)))
+
+        for y in range(rowStart, rowEnd):
+            yc = y + 0.5
+            cross = sorted(ax + (yc - ay) * slope for ay, by, ax, slope in edges if ay <= yc < by)
+            for k in range(0, len(cross) - 1, 2):
+                buff.fillSpan(y, math.ceil(cross[k] - 0.5), math.ceil(cross[k + 1] - 0.5), color)
@@ -0,0 +1,216 @@
+import os
+import sys
+import mmap
+import time
+import lzma
+import zlib
+import struct
+from typing import Optional
+
+from .baeshadesink import BaeFrameSink
+
+"""
+capture of encoded frames with their timestamps, and replay of it
+file: header, then per frame a record header followed by the stored bytes
+"""
+
+class BaeRecordCompression:
+
+    @staticmethod
+    def Raw():
+        """
+        frames as they are
+        """
+        return 0
+
+    @staticmethod
+    def Zlib():
+        """
+        zlib at a fast level, a good default for live capture
+        """
+        return 1
+
+    @staticmethod
+    def Lzma():
+        """
+        smaller files, costs more CPU per frame
+        """
+        return 2
+
+class BaeFrameRecorder(BaeFrameSink):
+    """
+    write frames to a capture file, usable as a sink of a headless pipeline too
+    every frame is written with one os.write, so a capture cut by a kill keeps all complete frames
+    """
+
+    Magic = b'BAESHREC'
+    Version = 1
+    # magic, version, compression, width, height
+    _Header = struct.Struct('<8sHBxHH')
+    # seconds since capture start, stored length, raw length, compression of this frame
+    _Frame = struct.Struct('<dIIB')
+
+    def __init__(self, path:str, width:int = 0, height:int = 0, compression:BaeRecordCompression = BaeRecordCompression.Raw):
+        """
+        width, height: virtual canvas size, informative only
+        compression: BaeRecordCompression, a frame is kept raw when compressing does not make it smaller
+        """
+        super().__init__()
+        self._compression = compression
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        self.__writeAll(BaeFrameRecorder._Header.pack(BaeFrameRecorder.Magic, BaeFrameRecorder.Version, compression(), width, height))
+        self._start = time.perf_counter()
+
+    def __writeAll(self, data:bytes)->None:
+        view = memoryview(data)
+        while len(view) > 0:
+            view = view[os.write(self._fd, view):]
+
+    def __pack(self, data:bytes):
+        match self._compression:
+            case BaeRecordCompression.Zlib:
+                packed = zlib.compress(data, 1)
+            case BaeRecordCompression.Lzma:
+                packed = lzma.compress(data, preset=0)
+            case _:
+                return data, BaeRecordCompression.Raw()
+        if len(packed) >= len(data):
+            return data, BaeRecordCompression.Raw()
+        return packed, self._compression()
+
+    def write(self, data:bytes, timestamp:Optional[float] = None)->None:
+        """
+        timestamp: perf_counter when the frame reached the terminal, default now
+        """
+        if self._fd is None:
+            return
+        super().write(data)
+        stamp = (time.perf_counter() if timestamp is None else timestamp) - self._start
+        packed, method = self.__pack(bytes(data))
+        self.__writeAll(BaeFrameRecorder._Frame.pack(stamp, len(packed), len(data), method) + packed)
+
+    def close(self)->None:
+        if self._fd is None:
+            return
+        os.close(self._fd)
+        self._fd = None
+
+class BaeFrameReplay:
+    """
+    memory map a capture, read its frames back
+    """
+
+    def __init__(self, path:str):
+        with open(path, 'rb') as fp:
+            self._map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        header = BaeFrameRecorder._Header
+        magic, version, compression, self._width, self._height = header.unpack_from(self._map, 0)
+        if magic != BaeFrameRecorder.Magic or version > BaeFrameRecorder.Version:
+            self._map.close()
+            raise ValueError(f'{path} is not a baeshade capture')
+        self._compression = compression
+
+        # (timestamp, offset, stored length, raw length, compression) of every complete frame
+        self._index = []
+        offset = header.size
+        frame = BaeFrameRecorder._Frame
+        while offset + frame.size <= len(self._map):
+            stamp, stored, raw, method = frame.unpack_from(self._map, offset)
+            if offset + frame.size + stored > len(self._map):
+                break
+            self._index.append((stamp, offset + frame.size, stored, raw, method))
+            offset += frame.size + stored
+        # frames are sliced from this view, not copied out of the map
+        self._view = memoryview(self._map)
+
+    def __len__(self)->int:
+        return len(self._index)
+
+    @property
+    def width(self)->int:
+        return self._width
+
+    @property
+    def height(self)->int:
+        return self._height
+
+    @property
+    def duration(self)->float:
+        return self._index[-1][0] if len(self._index) > 0 else 0.0
+
+    @property
+    def rawBytes(self)->int:
+        return sum(entry[3] for entry in self._index)
+
+    @property
+    def storedBytes(self)->int:
+        return sum(entry[2] for entry in self._index)
+
+    def timestamp(self, idx:int)->float:
+        return self._index[idx][0]
+
+    def __frameView(self, idx:int):
+        """
+        a raw frame as a view of the map, a compressed one decompressed from its view
+        """
+        _, offset, stored, _, method = self._index[idx]
+        data = self._view[offset:offset + stored]
+        if method == BaeRecordCompression.Zlib():
+            return zlib.decompress(data)
+        if method == BaeRecordCompression.Lzma():
+            return lzma.decompress(data)
+        return data
+
+    def frame(self, idx:int)->bytes:
+        data = self.__frameView(idx)
+        return data.tobytes() if isinstance(data, memoryview) else data
+
+    def __iter__(self):
+        for idx in range(len(self._index)):
+            yield self._index[idx][0], self.frame(idx)
+
+    def play(self, fd:Optional[int] = None, bRealtime:bool = True, speed:float = 1.0)->dict:
+        """
+        write frames to fd, stdout by default
+        bRealtime: keep the recorded timing scaled by speed, otherwise as fast as possible
+        return {'frames','bytes','seconds','writeSeconds','mbps','fps','lateFrames'}
+        """
+        fd = sys.stdout.fileno() if fd is None else fd
+        sys.stdout.flush()
+        written = 0
+        late = 0
+        writeTime = 0.0
+        first = self._index[0][0] if len(self._index) > 0 else 0.0
+        start = time.perf_counter()
+        for idx in range(len(self._index)):
+            data = self.__frameView(idx)
+            if bRealtime:
+                # absolute deadlines, a slow write does not shift the following frames
+                deadline = start + (self._index[idx][0] - first) / speed
+                wait = deadline - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                elif wait < -0.001:
+                    late += 1
+            writeStart = time.perf_counter()
+            view = data if isinstance(data, memoryview) else memoryview(data)
+            while len(view) > 0:
+                view = view[os.write(fd, view):]
+            writeTime += time.perf_counter() - writeStart
+            written += len(data)
+        seconds = time.perf_counter() - start
+        return {
+            'frames': len(self._index),
+            'bytes': written,
+            'seconds': seconds,
+            'writeSeconds': writeTime,
+            'mbps': written / writeTime / 1e6 if writeTime > 0 else 0.0,
+            'fps': len(self._index) / seconds if seconds > 0 else 0.0,
+            'lateFrames': late,
+        }
+
+    def close(self)->None:
+        if self._map is not None:
+            self._view.release()
+            self._map.close()
+            self._map = None
@@ -0,0 +1,51 @@
+import sys
+import argparse
+from typing import Optional
+
+from .baeshaderecord import BaeFrameReplay
+from .baeshadeutil import BaeshadeUtil
+
+"""
+replay a capture of BaeFrameRecorder on the terminal
+python -m baeshade.baeshadereplay play capture.baerec [--fast] [--speed 2] [--loop 3]
+"""
+
+def main(argv:Optional[list] = None)->int:
+    parser = argparse.ArgumentParser(prog='python -m baeshade.baeshadereplay', description='replay a baeshade capture')
+    parser.add_argument('command', choices=['play', 'info'])
+    parser.add_argument('path')
+    parser.add_argument('--fast', action='store_true', help='write as fast as possible, a stdout throughput benchmark')
+    parser.add_argument('--speed', type=float, default=1.0, help='timing scale of play')
+    parser.add_argument('--loop', type=int, default=1, help='play that many times')
+    args = parser.parse_args(argv)
+
+    replay = BaeFrameReplay(args.path)
+    if args.command == 'info':
+        print(f'{len(replay)} frames, {replay.duration:.2f}s, canvas {replay.width}x{replay.height},'
+              f' {replay.rawBytes:,} bytes raw, {replay.storedBytes:,} stored')
+        replay.close()
+        return 0
+
+    bScreen = sys.stdout.isatty()
+    if bScreen:
+        BaeshadeUtil.ExclusiveScreen(True)
+        BaeshadeUtil.showCursor(False)
+        BaeshadeUtil.clearScreen()
+    results = []
+    try:
+        for _ in range(args.loop):
+            results.append(replay.play(None, not args.fast, args.speed))
+    finally:
+        if bScreen:
+            BaeshadeUtil.restoreScreen()
+            BaeshadeUtil.showCursor(True)
+            BaeshadeUtil.ExclusiveScreen(False)
+            BaeshadeUtil.flush()
+        replay.close()
+    for stats in results:
+        print(f'{stats["frames"]} frames, {stats["bytes"]:,} bytes in {stats["seconds"]:.3f}s, {stats["fps"]:.1f} fps,'
+              f' write {stats["mbps"]:.1f} MB/s, {stats["lateFrames"]} late', file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
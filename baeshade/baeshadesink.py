@@ -0,0 +1,95 @@
+from collections import deque
+from typing import Optional
+
+"""
+frame sinks of a headless pipeline, frames go there instead of the terminal
+"""
+
+class BaeFrameSink:
+    """
+    receive encoded frames, subclass it and override write to send them somewhere
+    """
+
+    def __init__(self):
+        self._frameCount = 0
+        self._bytesWritten = 0
+
+    def write(self, data:bytes)->None:
+        """
+        one whole frame, escape sequences included
+        """
+        self._frameCount += 1
+        self._bytesWritten += len(data)
+
+    def close(self)->None:
+        pass
+
+    @property
+    def frameCount(self)->int:
+        return self._frameCount
+
+    @property
+    def bytesWritten(self)->int:
+        return self._bytesWritten
+
+class BaeNullSink(BaeFrameSink):
+    """
+    drop frames, only count them and their bytes
+    """
+    pass
+
+class BaeMemorySink(BaeFrameSink):
+    """
+    keep frames in memory
+    """
+
+    def __init__(self, maxFrames:Optional[int] = None):
+        """
+        maxFrames: keep only the latest ones, None keeps all
+        """
+        super().__init__()
+        self._frames = deque(maxlen=maxFrames)
+
+    def write(self, data:bytes)->None:
+        super().write(data)
+        self._frames.append(bytes(data))
+
+    @property
+    def frames(self)->list:
+        return list(self._frames)
+
+    @property
+    def lastFrame(self)->Optional[bytes]:
+        return self._frames[-1] if len(self._frames) > 0 else None
+
+    def getvalue(self)->bytes:
+        """
+        kept frames back to back, as a terminal would have received them
+        """
+        return b''.join(self._frames)
+
+class BaeFileSink(BaeFrameSink):
+    """
+    write frames to a file one after another, `cat` it in a terminal to watch them
+    """
+
+    def __init__(self, target, bAppend:bool = False):
+        """
+        target: path, or a binary file object the caller keeps ownership of
+        bAppend: keep what a target path holds and add frames after it, otherwise start it empty
+        """
+        super().__init__()
+        self._bOwner = isinstance(target, str)
+        self._fp = open(target, 'ab' if bAppend else 'wb') if self._bOwner else target
+
+    def write(self, data:bytes)->None:
+        super().write(data)
+        self._fp.write(data)
+
+    def close(self)->None:
+        if self._fp is None:
+            return
+        self._fp.flush()
+        if self._bOwner:
+            self._fp.close()
+        self._fp = None
@@ -33,6 +33,15 @@ class BaeshadeUtil:
         #sys.stdout.buffer.write(str.encode('UTF-8'))
         sys.stdout.write(str)
 
+    @staticmethod
+    def outputBytes(data):
+        """
+        write already encoded bytes, keep order with text written by output
+        """
+        sys.stdout.flush()
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+
     @staticmethod
     def flush():
         sys.stdout.flush()
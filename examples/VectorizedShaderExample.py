@@ -0,0 +1,54 @@
+"""Example How to draw use a vectorized shader"""
+
+import numpy as np
+from baeshade import BaeApp, BaeColorMode, BaeBufferStorage, BaeRenderingTask, BaeVec2d, BaeVec3d, BaeVec2Array, BaeMathUtil
+
+vec2 = BaeVec2d
+vec3 = BaeVec3d
+
+#reference:https://www.shadertoy.com/view/mtyGWy
+def palette(t):
+    a = vec3(0.5, 0.5, 0.5)
+    b = vec3(0.5, 0.5, 0.5)
+    c = vec3(1.0, 1.0, 1.0)
+    d = vec3(0.263,0.416,0.557)
+
+    # t is an array, so the result is a BaeVec3Array
+    return a + b*BaeMathUtil.cos(6.28318*(c*t+d))
+
+def pixelShader(x, y, uniforms):
+    # same as pixelShader in ShaderExample2.py, but x,y are the coordinates of all pixels
+    frageCoord = BaeVec2Array(x, y)
+    iResolution = vec2(uniforms.bw, uniforms.bh)
+    uv = (frageCoord * 2.0 - iResolution) / iResolution.Y
+    uv0 = uv
+    finalColor = vec3(0.0)
+    iTime = uniforms.time
+
+    for i in range(4):
+        uv = uv * 1.5 - uv - 0.5
+
+        d = uv.Length * np.exp(-uv0.Length)
+
+        col = palette(uv0.Length + i*.4 + iTime*.4)
+
+        d = np.abs(np.sin(d*8. + iTime)/8.)
+
+        d = np.power(0.01 / d, 1.2)
+
+        finalColor += col * d
+
+    return finalColor.asArray()*255
+
+class ShaderExampleTask(BaeRenderingTask):
+    def onDraw(self, delta: float):
+        self.DPI.runShaderVectorized(pixelShader)
+
+if __name__ == '__main__':
+    # set a RT desc
+    RT = {'width':96,'height':64,'colorMode':BaeColorMode.Color24Bits,'storage':BaeBufferStorage.UInt8}
+
+    # config app
+    app = BaeApp(RT)
+    app.addTask(ShaderExampleTask())
+    app.run()
@@ -1,5 +1,6 @@
 import asyncio
 import time
+from baeshade import BaeFramePacer
 
 async def measure_sleep_precision(sleep_time, repetitions):
     total_diff = 0
@@ -17,4 +18,19 @@ async def main():
     avg_diff = await measure_sleep_precision(sleep_time, repetitions)
     print(f"Average difference over {repetitions} repetitions: {avg_diff:.6f} ms")
 
-asyncio.run(main())
\ No newline at end of file
+async def measure_pacer_jitter(fps, frames):
+    pacer = BaeFramePacer(fps)
+    stamps = []
+    for _ in range(frames):
+        await pacer.wait()
+        stamps.append(time.perf_counter())
+    jitter = [abs(b - a - pacer.interval) for a, b in zip(stamps, stamps[1:])]
+    return sum(jitter) / len(jitter) * 1000, max(jitter) * 1000 # ms
+
+async def main_pacer():
+    fps = 60
+    avg, worst = await measure_pacer_jitter(fps, 120)
+    print(f"Frame pacer at {fps} fps, jitter average: {avg:.6f} ms, worst: {worst:.6f} ms")
+
+asyncio.run(main())
+asyncio.run(main_pacer())
\ No newline at end of file
@@ -0,0 +1,120 @@
+import re
+import random
+
+import pytest
+
+from baeshade import BaeColorMode, BaeBufferStorage, BaeVec3d
+from baeshade.baeshade import BaeBuffer, BaeTermDraw, BaeFrameEncoder, BAECODEX
+
+np = pytest.importorskip('numpy')
+
+W, H = 23, 16
+Modes = [BaeColorMode.Color24Bits, BaeColorMode.Color8Bits]
+Storages = [BaeBufferStorage.PyList, BaeBufferStorage.Float32, BaeBufferStorage.UInt8]
+
+def randomPixels(seed:int, colors:int = 5):
+    """
+    few colors, so rows have runs to elide and repeat
+    """
+    rng = random.Random(seed)
+    palette = [(rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)) for _ in range(colors)]
+    return np.array([[palette[rng.randrange(colors)] for x in range(W)] for y in range(H)], dtype=np.uint8)
+
+def filledBuffer(pixels, mode, storage)->BaeBuffer:
+    buff = BaeBuffer(W, H, mode, storage=storage)
+    buff.fillRegion(0, 0, [[BaeVec3d(r, g, b) for r, g, b in row] for row in pixels.tolist()])
+    return buff
+
+def encodePerPixel(buff:BaeBuffer)->str:
+    """
+    the scalar path, two virtual pixels per cell
+    """
+    rows = []
+    for row in range(0, H, 2):
+        rows.append(''.join(BaeTermDraw.encodePixel(topColr=buff.getPixel(x, row), botColr=buff.getPixel(x, row + 1), mode=buff.colorMode)
+                            for x in range(W)) + BAECODEX.NewLine)
+    return ''.join(rows)
+
+@pytest.mark.parametrize('mode', Modes, ids=lambda mode : mode())
+def test_encodeBufferSameForEveryStorage(mode):
+    pixels = randomPixels(1, 40)
+    buffers = [filledBuffer(pixels, mode, storage) for storage in Storages]
+    reference = encodePerPixel(buffers[0])
+    for buff in buffers:
+        assert BaeTermDraw.encodeBuffer(buff) == reference
+    assert BaeTermDraw.encodeFrame(pixels, mode) == reference.encode()
+
+class Terminal:
+    """
+    the part of a terminal the encoders use: CUP, CUF, SGR colors, REP, new line and printed cells
+    """
+    def __init__(self):
+        self.screen = {}
+        self.row, self.col = 1, 1
+        self.bg = self.fg = None
+        self.last = None
+
+    def feed(self, data:bytes)->None:
+        text = data.decode()
+        idx = 0
+        while idx < len(text):
+            if text[idx] == '\x1b':
+                match = re.match(r'\x1b\[([0-9;]*)([A-Za-z])', text[idx:])
+                idx += match.end()
+                params, command = match.group(1), match.group(2)
+                match command:
+                    case 'H':
+                        self.row, self.col = map(int, params.split(';')) if params else (1, 1)
+                    case 'C':
+                        self.col += int(params or 1)
+                    case 'b':
+                        for _ in range(int(params or 1)):
+                            self.put(self.last[2])
+                    case 'm':
+                        parts = params.split(';')
+                        if parts[0] == '48':
+                            self.bg = tuple(parts[2:])
+                        elif parts[0] == '38':
+                            self.fg = tuple(parts[2:])
+                        else:
+                            raise AssertionError(f'unexpected SGR {params}')
+                    case _:
+                        raise AssertionError(f'unexpected sequence {command}')
+            elif text[idx] == '\n':
+                self.row, self.col = self.row + 1, 1
+                idx += 1
+            else:
+                self.put(text[idx])
+                idx += 1
+
+    def put(self, char:str)->None:
+        self.last = (self.bg, self.fg, char)
+        self.screen[(self.row, self.col)] = self.last
+        self.col += 1
+
+def shown(frames, bDiff:bool, bElideSGR:bool, bUseREP:bool, mode)->dict:
+    """
+    screen after writing frames like the worker: each from the frame origin
+    """
+    encoder = BaeFrameEncoder(mode, bDiff=bDiff, bElideSGR=bElideSGR, bUseREP=bUseREP)
+    origin = BaeTermDraw.encodeCursorPos(2, 1)
+    term = Terminal()
+    for pixels in frames:
+        term.feed(origin + encoder.encode(pixels))
+    return term.screen
+
+@pytest.mark.parametrize('mode', Modes, ids=lambda mode : mode())
+@pytest.mark.parametrize('bDiff,bElideSGR,bUseREP', [(False, True, False), (False, False, True), (True, False, False),
+                                                     (True, True, False), (True, True, True)])
+def test_encoderOptionsShowTheSameScreen(mode, bDiff, bElideSGR, bUseREP):
+    frames = [randomPixels(2)]
+    rng = np.random.default_rng(3)
+    for _ in range(4):
+        # change a few cells, leave the rest to the diff
+        pixels = frames[-1].copy()
+        ys, xs = rng.integers(0, H, 12), rng.integers(0, W, 12)
+        pixels[ys, xs] = frames[0][(ys + 3) % H, (xs + 5) % W]
+        frames.append(pixels)
+    for count in range(1, len(frames) + 1):
+        expected = shown(frames[count - 1:count], False, False, False, mode)
+        assert shown(frames[:count], bDiff, bElideSGR, bUseREP, mode) == expected
@@ -0,0 +1,92 @@
+import multiprocessing
+
+from baeshade.baeshadeipc import BaeFrameRing, BaeFrameMailbox, BaeSharedDict
+
+def test_ringKeepsOrderAndCountsConsumed():
+    ring = BaeFrameRing(3, 16)
+    try:
+        assert all(ring.put(bytes([n]) * (n + 1), False) for n in range(3))
+        # full, the writer does not wait
+        assert ring.put(b'late', False) is False
+        assert (ring.published, ring.consumed) == (3, 0)
+        for n in range(3):
+            seq, view = ring.acquireFrame(0)
+            assert (seq, bytes(view)) == (n, bytes([n]) * (n + 1))
+            ring.releaseFrame()
+            assert ring.consumed == n + 1
+        assert ring.acquireFrame(0) is None
+        assert ring.put(b'again', False)
+        assert ring.acquireFrame(0)[0] == 3
+        ring.releaseFrame()
+    finally:
+        ring.close()
+
+def readAll(ring:BaeFrameRing, count:int, out)->None:
+    for _ in range(count):
+        seq, view = ring.acquireFrame()
+        out.put((seq, bytes(view)))
+        ring.releaseFrame()
+
+def test_ringAcrossProcesses():
+    ring = BaeFrameRing(2, 8)
+    out = multiprocessing.Queue()
+    reader = multiprocessing.Process(target=readAll, args=(ring, 20, out))
+    reader.start()
+    try:
+        for n in range(20):
+            # a 2 slot ring, the writer waits on the reader
+            assert ring.put(n.to_bytes(4, 'little'))
+        got = [out.get(timeout=10) for _ in range(20)]
+        reader.join(10)
+        assert got == [(n, n.to_bytes(4, 'little')) for n in range(20)]
+        assert ring.consumed == 20
+    finally:
+        ring.close()
+
+def test_mailboxKeepsTheLatestFrame():
+    box = BaeFrameMailbox(3, 8)
+    try:
+        assert box.slotCount == 3
+        assert box.put(b'a', False)
+        assert box.replaced == -1
+        # nothing read yet, each frame replaces the waiting one
+        assert box.put(b'b', False) and box.put(b'c', False)
+        assert (box.superseded, box.replaced, box.published) == (2, 1, 3)
+        seq, view = box.acquireFrame(0)
+        assert (seq, bytes(view)) == (2, b'c')
+        # frames before the one read are done, the one read is not
+        assert box.consumed == 2
+        # written while the reader holds its slot
+        assert box.put(b'd', False) and box.replaced == -1
+        assert box.put(b'e', False) and box.replaced == 3
+        assert bytes(view) == b'c'
+        box.releaseFrame()
+        assert box.consumed == 3
+        seq, view = box.acquireFrame(0)
+        assert (seq, bytes(view)) == (4, b'e')
+        box.releaseFrame()
+        assert (box.consumed, box.superseded) == (5, 3)
+        assert box.acquireFrame(0) is None
+    finally:
+        box.close()
+
+def readSettings(shared:BaeSharedDict, changed, out)->None:
+    out.put(shared['colorMode'])
+    changed.wait(10)
+    out.put((shared['colorMode'], shared.get('bQuit'), shared.get('missing', 3)))
+
+def test_sharedDictSeesUpdates():
+    shared = BaeSharedDict({'colorMode': 1, 'bQuit': False})
+    changed = multiprocessing.Event()
+    out = multiprocessing.Queue()
+    reader = multiprocessing.Process(target=readSettings, args=(shared, changed, out))
+    reader.start()
+    try:
+        assert out.get(timeout=10) == 1
+        shared['bQuit'] = True
+        shared.update({'colorMode': 2})
+        changed.set()
+        assert out.get(timeout=10) == (2, True, 3)
+        reader.join(10)
+    finally:
+        shared.close()
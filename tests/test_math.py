@@ -0,0 +1,31 @@
+from baeshade import BaeColorMode, BaeBufferStorage, BaeVec2d, BaeVec3d
+from baeshade.baeshade import BaeBuffer, ColorPallette24bit
+
+def components(vec)->tuple:
+    return vec.X, vec.Y, vec.Z
+
+def test_inPlaceOperatorsLeaveSharedCellsAlone():
+    buff = BaeBuffer(4, 4, BaeColorMode.Color24Bits, storage=BaeBufferStorage.PyList)
+    buff.clear(BaeVec3d(10, 20, 30))
+    pixel = buff.getPixel(1, 1)
+    pixel += BaeVec3d(1, 1, 1)
+    pixel -= 2
+    pixel *= 3
+    pixel /= 2
+    assert components(pixel) == (13.5, 28.5, 43.5)
+    assert {components(buff.getPixel(x, y)) for y in range(4) for x in range(4)} == {(10, 20, 30)}
+    assert components(buff.clearColor) == (10, 20, 30)
+
+def test_inPlaceOperatorsLeavePaletteAlone():
+    color = ColorPallette24bit.red.value
+    color += 1
+    assert components(color) == (256, 1, 1)
+    assert components(ColorPallette24bit.red.value) == (255, 0, 0)
+
+def test_inPlaceOperatorsOn2d():
+    origin = BaeVec2d(1, 2)
+    moved = origin
+    moved += BaeVec2d(1, 1)
+    moved /= 2
+    assert (moved.X, moved.Y) == (1.0, 1.5)
+    assert (origin.X, origin.Y) == (1, 2)
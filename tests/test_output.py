@@ -0,0 +1,32 @@
+import os
+import time
+import threading
+
+from baeshade import BaeOutputWriter
+
+def slowReader(fd:int, received:bytearray)->None:
+    while True:
+        time.sleep(0.001)
+        data = os.read(fd, 16384)
+        if len(data) == 0:
+            break
+        received += data
+
+def test_nonBlockingFdWaitsAndResumes():
+    read, write = os.pipe()
+    os.set_blocking(write, False)
+    received = bytearray()
+    reader = threading.Thread(target=slowReader, args=(read, received))
+    reader.start()
+    frame = os.urandom(1024 * 1024)
+    parts = [b'\x1b[1;1H', frame, memoryview(frame)[:1000], b'\x1b[2;1H']
+    writer = BaeOutputWriter(write, chunkSize=256 * 1024)
+    try:
+        total = writer.write(*parts)
+    finally:
+        os.close(write)
+        reader.join()
+        os.close(read)
+    assert total == writer.bytesWritten == sum(len(part) for part in parts)
+    assert bytes(received) == b''.join(parts)
+    assert writer.partialWrites > 0 and writer.stalls > 0 and writer.lastStall > 0
@@ -0,0 +1,102 @@
+import os
+import time
+import signal
+import asyncio
+import threading
+from multiprocessing import resource_tracker
+
+import pytest
+
+from baeshade import BaeColorMode, BaeBufferStorage, BaePresentMode, BaeRenderingTask, BaeVec2d, BaeVec3d
+from baeshade.baeshade import BaeTermDrawPipeline, BaeSwapChain
+
+pytest.importorskip('numpy')
+
+class Noise(BaeRenderingTask):
+    """
+    a different frame every time, so the encoder can't make it small
+    """
+    def onDraw(self, delta):
+        for y in range(0, 48, 2):
+            self.DPI.drawRect2D(BaeVec2d(0, y), BaeVec2d(80, 2), BaeVec3d(*os.urandom(3)))
+
+def slowReader(fd:int, stop:threading.Event)->None:
+    while not stop.is_set():
+        time.sleep(0.002)
+        try:
+            os.read(fd, 4096)
+        except BlockingIOError:
+            pass
+
+def presentOnSlowTerminal(frames:int):
+    """
+    present frames in Mailbox zero copy mode to a terminal far slower than them
+    return (superseded frames, for every present whether the next acquire would have to wait)
+    """
+    # started before the redirect, or the tracker process would keep the pipe as its stdout
+    resource_tracker.ensure_running()
+    # the worker writes to fd 1, make it a pipe drained far slower than frames come
+    read, write = os.pipe()
+    os.set_blocking(read, False)
+    saved = os.dup(1)
+    os.dup2(write, 1)
+    os.close(write)
+    stop = threading.Event()
+    reader = threading.Thread(target=slowReader, args=(read, stop))
+    reader.start()
+    pipe = BaeTermDrawPipeline({'width':80, 'height':48, 'colorMode':BaeColorMode.Color24Bits, 'presentMode':BaePresentMode.Mailbox,
+                                'bEncodeInWorker':True, 'storage':BaeBufferStorage.UInt8})
+    task = Noise()
+    task.setDPI(pipe)
+    chain = pipe.swapChain
+    waits = []
+    async def run():
+        for _ in range(frames):
+            await pipe.present(0.0, [task])
+            # reading and waiting frames hold a buffer each, a superseded one must not, so the next acquire finds one free
+            chain.retire(pipe._rtRing.consumed)
+            waits.append(all(chain.state(idx) != BaeSwapChain.Free for idx in range(chain.count)))
+            await asyncio.sleep(0.002)
+    try:
+        asyncio.run(run())
+        pipe.pollFrameStats()
+        superseded = pipe.supersededFrames
+    finally:
+        pipe.shutDown()
+        os.dup2(saved, 1)
+        os.close(saved)
+        stop.set()
+        reader.join()
+        os.close(read)
+    return superseded, waits
+
+def test_mailboxZeroCopyKeepsABufferFree(capsys):
+    # the worker writes to sys.stdout, a file of its own under pytest capture
+    with capsys.disabled():
+        superseded, waits = presentOnSlowTerminal(60)
+    assert superseded > 0
+    assert not any(waits)
+
+def test_workerLeavesCtrlCAndCtrlZToTheApp():
+    # a forked worker would run the app handler in its own process, it reports through a pipe
+    read, write = os.pipe()
+    os.set_blocking(read, False)
+    previous = signal.signal(signal.SIGTSTP, lambda sig, frame : os.write(write, b'z'))
+    pipe = BaeTermDrawPipeline({'width':20, 'height':10, 'colorMode':BaeColorMode.Color24Bits})
+    try:
+        # the worker is forked by the first present, after the app handler is set
+        asyncio.run(pipe.present(0.0, []))
+        worker = pipe.encodeWorker._worker
+        # let it reach its frame loop
+        time.sleep(0.2)
+        os.kill(worker.pid, signal.SIGTSTP)
+        os.kill(worker.pid, signal.SIGINT)
+        time.sleep(0.2)
+        assert worker.is_alive()
+        with pytest.raises(BlockingIOError):
+            os.read(read, 1)
+    finally:
+        pipe.shutDown()
+        signal.signal(signal.SIGTSTP, previous)
+        os.close(read)
+        os.close(write)
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from baeshade import BaeColorMode, BaeBufferStorage, BaeVec3d
+from baeshade.baeshade import BaeBuffer
+from baeshade.baeshaderaster import BaeRaster
+
+W, H = 37, 23
+Color = BaeVec3d(255, 1, 2)
+
+def storages():
+    try:
+        import numpy
+    except ImportError:
+        return [BaeBufferStorage.PyList]
+    return [BaeBufferStorage.PyList, BaeBufferStorage.UInt8, BaeBufferStorage.Float32]
+
+def covered(buff)->set:
+    return {(x, y) for y in range(H) for x in range(W) if (buff.getPixel(x, y).X, buff.getPixel(x, y).Y, buff.getPixel(x, y).Z) == (255, 1, 2)}
+
+def randomLines(count:int, seed:int = 1):
+    rng = random.Random(seed)
+    for _ in range(count):
+        reach = rng.choice([5, 40, 120])
+        yield rng.randint(-reach, W + reach), rng.randint(-reach, H + reach), rng.randint(-reach, W + reach), rng.randint(-reach, H + reach)
+
+@pytest.mark.parametrize('storage', storages(), ids=lambda storage : storage())
+def test_lineMatchesLinePoints(storage):
+    for x0, y0, x1, y1 in randomLines(400):
+        buff = BaeBuffer(W, H, BaeColorMode.Color24Bits, storage=storage)
+        BaeRaster.line(buff, x0, y0, x1, y1, Color)
+        expect = {(x, y) for x, y in BaeRaster.linePoints(x0, y0, x1, y1) if 0 <= x < W and 0 <= y < H}
+        assert covered(buff) == expect, (x0, y0, x1, y1)
+
+def test_ddaLineInsideKeepsItsSteps():
+    for x0, y0, x1, y1 in randomLines(400, seed=2):
+        x0, y0 = x0 % W, y0 % H
+        buff = BaeBuffer(W, H, BaeColorMode.Color24Bits)
+        BaeRaster.ddaLine(buff, x0, y0, x1, y1, Color)
+        dx, dy = x1 - x0, y1 - y0
+        steps = max(abs(dx), abs(dy))
+        expect = set()
+        ptX, ptY = x0, y0
+        for _ in range(steps):
+            if 0 <= int(ptX) < W and 0 <= int(ptY) < H:
+                expect.add((int(ptX), int(ptY)))
+            ptX += dx / float(steps)
+            ptY += dy / float(steps)
+        assert covered(buff) == expect, (x0, y0, x1, y1)
+
+def test_lineFarOffscreenIsClipped():
+    # walking these would take billions of steps
+    buff = BaeBuffer(W, H, BaeColorMode.Color24Bits)
+    BaeRaster.line(buff, -10**9, 0, 10**9, 20, Color)
+    assert covered(buff) == {(x, 10) for x in range(W)}
+    buff = BaeBuffer(W, H, BaeColorMode.Color24Bits)
+    BaeRaster.ddaLine(buff, -10**9, 0, 10**9, 20, Color)
+    assert len(covered(buff)) == W
@@ -0,0 +1,47 @@
+import os
+import time
+
+import pytest
+
+from baeshade import BaeFrameRecorder, BaeFrameReplay, BaeRecordCompression
+
+Frames = [b'\x1b[2;1H' + bytes([65 + n % 26]) * (n * 97) for n in range(12)] + [os.urandom(300)]
+
+@pytest.mark.parametrize('compression', [BaeRecordCompression.Raw, BaeRecordCompression.Zlib, BaeRecordCompression.Lzma], ids=lambda compression : compression.__name__)
+def test_recordReplayRoundTrip(tmp_path, compression):
+    path = str(tmp_path / 'capture.bae')
+    recorder = BaeFrameRecorder(path, 80, 48, compression)
+    start = time.perf_counter()
+    for n, data in enumerate(Frames):
+        recorder.write(data, start + n * 0.01)
+    recorder.close()
+
+    replay = BaeFrameReplay(path)
+    assert (len(replay), replay.width, replay.height) == (len(Frames), 80, 48)
+    assert [replay.frame(idx) for idx in range(len(replay))] == Frames
+    assert [stamp for stamp, _ in replay] == pytest.approx([n * 0.01 for n in range(len(Frames))], abs=1e-3)
+    assert replay.rawBytes == sum(len(data) for data in Frames)
+    if compression is not BaeRecordCompression.Raw:
+        assert replay.storedBytes < replay.rawBytes
+
+    read, write = os.pipe()
+    try:
+        stats = replay.play(write, bRealtime=False)
+        os.close(write)
+        with os.fdopen(read, 'rb') as fp:
+            assert fp.read() == b''.join(Frames)
+    finally:
+        replay.close()
+    assert stats['frames'] == len(Frames) and stats['bytes'] == replay.rawBytes
+
+def test_replayKeepsCompleteFramesOfACutCapture(tmp_path):
+    path = str(tmp_path / 'capture.bae')
+    recorder = BaeFrameRecorder(path, compression=BaeRecordCompression.Zlib)
+    for data in Frames[:4]:
+        recorder.write(data)
+    recorder.close()
+    with open(path, 'r+b') as fp:
+        fp.truncate(os.path.getsize(path) - 3)
+    replay = BaeFrameReplay(path)
+    assert [replay.frame(idx) for idx in range(len(replay))] == Frames[:3]
+    replay.close()
@@ -0,0 +1,25 @@
+from baeshade import BaeFileSink, BaeMemorySink
+
+def test_fileSinkStartsEmpty(tmp_path):
+    path = tmp_path / 'frames.bin'
+    path.write_bytes(b'old')
+    sink = BaeFileSink(str(path))
+    sink.write(b'a')
+    sink.write(b'b')
+    sink.close()
+    assert path.read_bytes() == b'ab'
+    assert sink.frameCount == 2 and sink.bytesWritten == 2
+
+def test_fileSinkAppends(tmp_path):
+    path = tmp_path / 'frames.bin'
+    path.write_bytes(b'old')
+    sink = BaeFileSink(str(path), bAppend=True)
+    sink.write(b'new')
+    sink.close()
+    assert path.read_bytes() == b'oldnew'
+
+def test_memorySinkKeepsLatest():
+    sink = BaeMemorySink(maxFrames=2)
+    for frame in (b'1', b'2', b'3'):
+        sink.write(frame)
+    assert sink.frames == [b'2', b'3'] and sink.getvalue() == b'23' and sink.frameCount == 3